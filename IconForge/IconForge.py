@@ -12,6 +12,7 @@ def main():
     # Lazy imports for faster startup
     from PyQt6.QtWidgets import QApplication
     from ui import MainWindow
+    from ui.styles import load_stylesheet
     
     app = QApplication(sys.argv)
     app.setApplicationName("IconForge")
@@ -19,6 +20,7 @@ def main():
     
     # Set application style
     app.setStyle("Fusion")
+    app.setStyleSheet(load_stylesheet())
     
     # Create and show main window
     window = MainWindow()
@@ -8,10 +8,13 @@ from PyQt6.QtWidgets import (
     QSlider, QLineEdit, QProgressBar, QMessageBox, QColorDialog,
     QSpinBox, QTabWidget, QComboBox, QScrollArea, QSplitter
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QPixmap, QImage, QDragEnterEvent, QDropEvent
-from PIL import Image, ImageChops, ImageFilter
+from PyQt6.QtCore import Qt, QThread, QSignalBlocker, pyqtSignal
+from PyQt6.QtGui import QPixmap, QImage, QImageReader, QDragEnterEvent, QDropEvent
+from PIL import Image, ImageChops, ImageFilter, ImageOps
 from pathlib import Path
+from collections import OrderedDict
+import hashlib
+import os
 import sys
 
 from core import ImageProcessor, AutoCropper, MaskingEngine, IconExporter, EdgeProcessor, BorderMasking, CompositionEngine
@@ -20,10 +23,12 @@ from core.filters import FilterEngine
 from core.icon_audit import IconAuditor, IssueSeverity
 from core.icon_audit import IconAuditor, IssueSeverity
 from ui.audit_dialog import AuditReportDialog
-from ui.styles import MODERN_STYLESHEET
 from ui.widgets import TransparencyLabel
 from utils import ArchiveManager
 
+# Number of recent audit results kept for unchanged images
+AUDIT_CACHE_SIZE = 8
+
 
 class IconGeneratorThread(QThread):
     """Background thread for icon generation."""
@@ -112,6 +117,46 @@ class IconGeneratorThread(QThread):
             self.finished.emit(False, str(e))
 
 
+class IconAuditThread(QThread):
+    """Background thread for the pre-export audit."""
+    
+    audit_done = pyqtSignal(list)
+    audit_failed = pyqtSignal(str)
+    
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+    
+    def run(self):
+        """Audit the image off the GUI thread."""
+        try:
+            issues = IconAuditor.audit_image(self.image)
+        except Exception as e:
+            self.audit_failed.emit(str(e))
+            return
+        self.audit_done.emit(issues)
+
+
+class HistorySaveThread(QThread):
+    """Background thread for writing a history checkpoint."""
+    
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, image, path):
+        super().__init__()
+        self.image = image
+        self.path = path
+    
+    def run(self):
+        """Save the checkpoint off the GUI thread."""
+        try:
+            # Checkpoints are local scratch: favour encode speed over file size
+            self.image.save(self.path, 'PNG', compress_level=1, optimize=False)
+            self.finished.emit(True, self.path)
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+
 class MainWindow(QMainWindow):
     """Main application window."""
     
@@ -121,15 +166,19 @@ class MainWindow(QMainWindow):
         self.current_mask_color = (255, 255, 255)
         self.processor = ImageProcessor()
         self.reference_image = None # Phase 21: Reference Comparison
+        self.reference_path = None
         self.reference_pixmap = None
         self.current_mask_color = (255, 255, 255)
+        self._audit_cache = OrderedDict() # image digest -> audit issues (LRU)
+        self._last_refresh_key = None # Last rendered viewport state
+        self._history_cache_key = None # (history dir mtime, base stem) of the cached scan
+        self._history_cache_versions = []
         self.init_ui()
     
     def init_ui(self):
         """Initialize the modern user interface."""
         self.setWindowTitle("IconForge - Professional Edition")
         self.setMinimumSize(1200, 850) # Wider default
-        self.setStyleSheet(MODERN_STYLESHEET)
         
         # Central widget
         central = QWidget()
@@ -968,7 +1017,7 @@ class MainWindow(QMainWindow):
         """Load an image file."""
         if self.processor.load_image(path):
             self.current_source_path = path
-            file_name = Path(path).stem
+            file_name = os.path.splitext(os.path.basename(path))[0]
             
             # Update Info Label
             w, h = self.processor.source_image.size
@@ -1329,8 +1378,12 @@ class MainWindow(QMainWindow):
         
         # Run Comparative Audit if Reference is loaded
         comp_stats = None
-        if hasattr(self, 'reference_image') and self.reference_image:
+        if self.reference_path:
             try:
+                if self.reference_image is None:
+                    # Same EXIF orientation as the displayed reference pixmap
+                    self.reference_image = ImageOps.exif_transpose(Image.open(self.reference_path)).convert('RGBA')
+                    
                 # 1. Analyze Both
                 processed_img = self.processor.processed_image
                 ref_img = self.reference_image.resize(processed_img.size, Image.Resampling.LANCZOS)
@@ -1374,19 +1427,12 @@ class MainWindow(QMainWindow):
         
         # 3. Auto-Commit (Phase 12)
         # This saves to history/, reloads the file, and resets the pipeline.
-        self.promote_preview_to_source(confirm=False)
-        
-        QMessageBox.information(
-            self, 
-            "Auto-Fix Applied", 
-            "✅ Fix Applied & Committed!\n\n"
-            "1. Smoothing & Sharpening applied.\n"
-            "2. Result saved as new Source.\n"
-            "3. Pipeline reset for next step."
-        )
+        # The confirmation is shown by history_save_finished once the save has landed.
+        self.promote_preview_to_source(confirm=False, auto_fix=True)
         
-    def promote_preview_to_source(self, confirm: bool = True):
-        """Phase 10: Promote current preview to be the new source (Save & Reload)."""
+    def promote_preview_to_source(self, confirm: bool = True, auto_fix: bool = False):
+        """Phase 10: Promote current preview to be the new source (Save & Reload).
+        auto_fix: report the result as the audit's Auto-Fix rather than a manual commit."""
         if not self.processor.processed_image:
             return
             
@@ -1415,12 +1461,12 @@ class MainWindow(QMainWindow):
         
         if should_proceed:
             # 1. Create History Directory
-            history_dir = Path("history")
-            history_dir.mkdir(exist_ok=True)
+            history_dir = "history"
+            os.makedirs(history_dir, exist_ok=True)
             
             # 2. Generate Unique Filename
             # {original_stem}_v{timestamp}.png
-            original_stem = Path(self.current_source_path).stem
+            original_stem = os.path.splitext(os.path.basename(self.current_source_path))[0]
             # Remove existing version suffix if present to avoid v1_v2_v3 chains
             import re
             base_stem = re.sub(r'_v\d{14}$', '', original_stem) 
@@ -1428,65 +1474,90 @@ class MainWindow(QMainWindow):
             from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             new_filename = f"{base_stem}_v{timestamp}.png"
-            new_path = history_dir / new_filename
+            new_path = os.path.join(history_dir, new_filename)
             
-            # 3. Save Processed Image
-            try:
-                self.processor.processed_image.save(new_path)
-            except Exception as e:
-                QMessageBox.critical(self, "Error Saving", f"Could not save history file:\n{e}")
-                return
-            
-            # 4. Reload as New Source (True Reset)
-            # This triggers load_image -> resets masking, geometry, stroke -> updates UI
-            self.load_image(str(new_path.absolute()))
-            
-            # 5. Toast
-            QMessageBox.information(self, "Changes Committed", 
-                                  f"Saved version: {new_filename}\n\n"
-                                  "The pipeline has been reset. You are now working on the clean, committed version.")
+            # 3. Save Processed Image (in the background; reload continues from the slot)
+            self.commit_btn.setEnabled(False)
+            self.save_worker = HistorySaveThread(self.processor.processed_image, new_path)
+            self.save_worker.finished.connect(
+                lambda success, message: self.history_save_finished(success, message, auto_fix)
+            )
+            self.save_worker.start()
+
+    def history_save_finished(self, success: bool, message: str, auto_fix: bool = False):
+        """Reload the committed checkpoint once it has been written."""
+        self.commit_btn.setEnabled(True)
+        
+        if not success:
+            title = "Auto-Fix Failed" if auto_fix else "Error Saving"
+            QMessageBox.critical(self, title, f"Could not save history file:\n{message}")
+            return
+        
+        # New file in history/: force a rescan even if the mtime looks unchanged
+        self._history_cache_key = None
+        
+        # 4. Reload as New Source (True Reset)
+        # This triggers load_image -> resets masking, geometry, stroke -> updates UI
+        self.load_image(os.path.abspath(message))
+        
+        # 5. Toast
+        if auto_fix:
+            QMessageBox.information(
+                self, 
+                "Auto-Fix Applied", 
+                "✅ Fix Applied & Committed!\n\n"
+                "1. Smoothing & Sharpening applied.\n"
+                "2. Result saved as new Source.\n"
+                "3. Pipeline reset for next step."
+            )
+            return
+        QMessageBox.information(self, "Changes Committed", 
+                              f"Saved version: {os.path.basename(message)}\n\n"
+                              "The pipeline has been reset. You are now working on the clean, committed version.")
 
     def reset_ui_controls_after_commit(self):
         """Reset all processing controls to neutral state."""
-        # 1. Geometry (The Enforcer) - Reset to Neutral
-        # We set smoothing to 0 because the image is ALREADY smoothed.
-        self.smooth_slider.blockSignals(True)
-        self.smooth_slider.setValue(0) # 0 = Faithful to the new source
-        self.smooth_slider.blockSignals(False)
-        self.smooth_label.setText("Smoothing (Wart Removal): 0")
-        
-        # Sharpness stays at 50 (Neutral/Standard)
-        self.sharp_slider.blockSignals(True)
-        self.sharp_slider.setValue(50) 
-        self.sharp_slider.blockSignals(False)
-        self.sharp_label.setText("Corner Sharpness: 50")
-        
-        # Stroke Engine - Reset to Neutral
-        self.stroke_slider.blockSignals(True)
-        self.stroke_slider.setValue(0)
-        self.stroke_slider.blockSignals(False)
-        self.stroke_label.setText("Stroke Weight (Boldness): 0")
-        
-        self.sharpen_slider.blockSignals(True)
-        self.sharpen_slider.setValue(0)
-        self.sharpen_slider.blockSignals(False)
-        self.sharpen_label.setText("Resolution Snap (Sharpen): 0")
-        
-        # 2. Cleanup Tab - Reset
-        self.mask_none.setChecked(True) # Disable masking
-        
-        # Reset Masking Lab
-        self.mask_choke_slider.blockSignals(True)
-        self.mask_choke_slider.setValue(0)
-        self.mask_choke_slider.blockSignals(False)
-        if hasattr(self, 'enable_key_2'):
-            self.enable_key_2.setChecked(False)
+        # Batch the resets: one repaint at the end instead of one per setValue
+        self.setUpdatesEnabled(False)
+        blockers = [QSignalBlocker(w) for w in (
+            self.smooth_slider, self.sharp_slider, self.stroke_slider,
+            self.sharpen_slider, self.mask_choke_slider
+        )]
+        try:
+            # 1. Geometry (The Enforcer) - Reset to Neutral
+            # We set smoothing to 0 because the image is ALREADY smoothed.
+            self.smooth_slider.setValue(0) # 0 = Faithful to the new source
+            self.smooth_label.setText("Smoothing (Wart Removal): 0")
             
-        self.defringe_check.setChecked(False)
-        self.edge_controls.setEnabled(False)
-        
-        # 3. Geometry Tab - Reset (Simulated)
-        # We already reset sliders above
+            # Sharpness stays at 50 (Neutral/Standard)
+            self.sharp_slider.setValue(50) 
+            self.sharp_label.setText("Corner Sharpness: 50")
+            
+            # Stroke Engine - Reset to Neutral
+            self.stroke_slider.setValue(0)
+            self.stroke_label.setText("Stroke Weight (Boldness): 0")
+            
+            self.sharpen_slider.setValue(0)
+            self.sharpen_label.setText("Resolution Snap (Sharpen): 0")
+            
+            # 2. Cleanup Tab - Reset
+            self.mask_none.setChecked(True) # Disable masking
+            
+            # Reset Masking Lab
+            self.mask_choke_slider.setValue(0)
+            if hasattr(self, 'enable_key_2'):
+                self.enable_key_2.setChecked(False)
+                
+            self.defringe_check.setChecked(False)
+            self.edge_controls.setEnabled(False)
+            
+            # 3. Geometry Tab - Reset (Simulated)
+            # We already reset sliders above
+        finally:
+            for blocker in blockers:
+                blocker.unblock()
+            self.setUpdatesEnabled(True)
+            self.update()
 
     def generate_icons(self):
         """Start icon generation."""
@@ -1494,8 +1565,44 @@ class MainWindow(QMainWindow):
             return
             
         # Phase 21: Audit Check (Alert only at the end)
-        # Phase 21: Audit Check (Alert only at the end)
-        issues = IconAuditor.audit_image(self.processor.processed_image)
+        # Runs in the background; export continues from the result slot.
+        # Unchanged images reuse the previous result without re-scanning.
+        image = self.processor.processed_image
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(f"{image.mode}{image.size}".encode())
+        key = digest.digest()
+        
+        issues = self._audit_cache.get(key)
+        if issues is not None:
+            self._audit_cache.move_to_end(key)
+            self.on_export_audit_done(issues)
+            return
+        
+        self.generate_btn.setEnabled(False)
+        self.audit_worker = IconAuditThread(image)
+        self.audit_worker.audit_done.connect(lambda issues: self.cache_audit_result(key, issues))
+        self.audit_worker.audit_done.connect(self.on_export_audit_done)
+        self.audit_worker.audit_failed.connect(self.on_export_audit_failed)
+        self.audit_worker.start()
+
+    def on_export_audit_failed(self, message: str):
+        """Report a failed pre-export audit and give the Generate button back."""
+        self.generate_btn.setEnabled(True)
+        QMessageBox.critical(
+            self,
+            "Error",
+            f"Icon audit failed:\n{message}"
+        )
+
+    def cache_audit_result(self, key: bytes, issues: list):
+        """Remember an audit result, evicting the least recently used entry."""
+        self._audit_cache[key] = issues
+        self._audit_cache.move_to_end(key)
+        while len(self._audit_cache) > AUDIT_CACHE_SIZE:
+            self._audit_cache.popitem(last=False)
+
+    def on_export_audit_done(self, issues: list):
+        """Confirm export with the user if the audit found issues, then start generation."""
         # Filter to relevant issues (Warning/Error)
         relevant_issues = [i for i in issues if i.severity in [IssueSeverity.WARNING, IssueSeverity.ERROR]]
         
@@ -1515,12 +1622,13 @@ class MainWindow(QMainWindow):
             )
             
             if reply == QMessageBox.StandardButton.No:
+                self.generate_btn.setEnabled(True)
                 return
         
         # Get icon name (use custom name if provided, otherwise use source filename)
         icon_name = self.icon_name_input.text().strip()
         if not icon_name:
-            icon_name = Path(self.current_source_path).stem
+            icon_name = os.path.splitext(os.path.basename(self.current_source_path))[0]
         
         # Prepare settings
         settings = {
@@ -1567,19 +1675,18 @@ class MainWindow(QMainWindow):
         if not self.current_source_path:
             return
             
-        path = str(Path(self.current_source_path).absolute())
+        path = os.path.abspath(self.current_source_path)
         
+        # Fire-and-forget: don't block the GUI thread waiting on the file manager
         try:
+            import subprocess
             if sys.platform == 'darwin':
-                import subprocess
-                subprocess.run(['open', '-R', path])
+                subprocess.Popen(['open', '-R', path], close_fds=True, start_new_session=True)
             elif sys.platform == 'win32':
-                import subprocess
-                subprocess.run(['explorer', '/select,', path])
+                subprocess.Popen(['explorer', '/select,', path], close_fds=True)
             else:
                 # Linux fallback
-                import subprocess
-                subprocess.run(['xdg-open', str(Path(path).parent)])
+                subprocess.Popen(['xdg-open', os.path.dirname(path)], close_fds=True, start_new_session=True)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not reveal file:\n{e}")
 
@@ -1589,7 +1696,7 @@ class MainWindow(QMainWindow):
             return
             
         # Verify file exists
-        if not Path(self.current_source_path).exists():
+        if not os.path.isfile(self.current_source_path):
             QMessageBox.warning(self, "Error", "Source file no longer exists!")
             return
             
@@ -1679,47 +1786,49 @@ class MainWindow(QMainWindow):
         self.history_combo.clear()
         
         # 1. Identify Base Stem (Root of the Timeline)
-        current_stem = Path(current_path).stem
+        current_stem = os.path.splitext(os.path.basename(current_path))[0]
         import re
         base_stem = re.sub(r'_v\d{14}$', '', current_stem)
         
-        history_dir = Path("history")
-        versions = []
-        
-        # 2. Add History Versions
-        if history_dir.exists():
-            for f in history_dir.glob(f"{base_stem}_v*.png"):
-                try:
-                    ts_str = f.stem.split('_v')[-1]
-                    from datetime import datetime
-                    dt = datetime.strptime(ts_str, "%Y%m%d%H%M%S")
-                    display_time = dt.strftime("%H:%M:%S")
-                    versions.append({
-                        'path': str(f.absolute()),
-                        'name': f"v.{ts_str[-6:]} ({display_time})", 
-                        'ts': ts_str
-                    })
-                except:
-                    continue
-                    
-        # Sort by timestamp descending (newest first)
-        versions.sort(key=lambda x: x['ts'], reverse=True)
+        history_dir = "history"
+        prefix = f"{base_stem}_v"
+        current_abs = os.path.abspath(current_path)
+        
+        # 2. Collect History Versions
+        # Cached per (directory mtime, base stem): switching between versions doesn't rescan.
+        cache_key = None
+        if os.path.isdir(history_dir):
+            cache_key = (os.stat(history_dir).st_mtime_ns, base_stem)
+        
+        if cache_key is not None and cache_key == self._history_cache_key:
+            versions = self._history_cache_versions
+        else:
+            versions = []
+            if cache_key is not None:
+                # Filenames embed a YYYYMMDDHHMMSS stamp, so name order is time order (newest first)
+                entries = sorted(
+                    (e for e in os.scandir(history_dir) if e.name.startswith(prefix) and e.name.endswith('.png')),
+                    key=lambda e: e.name, reverse=True
+                )
+                for entry in entries:
+                    ts_str = entry.name[len(prefix):-4]
+                    if len(ts_str) != 14 or not ts_str.isdigit():
+                        continue
+                    display_time = f"{ts_str[8:10]}:{ts_str[10:12]}:{ts_str[12:14]}"
+                    versions.append((f"v.{ts_str[-6:]} ({display_time})", os.path.abspath(entry.path)))
+            self._history_cache_key = cache_key
+            self._history_cache_versions = versions
         
         # 3. Add Items to Combo (Unified List)
         # Scan list to find which one is "Current"
-        current_idx = 0 
         found_active = False # Initialize explicitly 
         
-        # Add matches
-        # Add matches
-        for i, v in enumerate(versions):
-            item_name = v['name']
-            item_path = v['path']
+        for item_name, item_path in versions:
             self.history_combo.addItem(item_name, item_path)
             
             # Check if this is the current one
-            if item_path == str(Path(current_path).absolute()):
-                 self.history_combo.setCurrentIndex(i)
+            if item_path == current_abs:
+                 self.history_combo.setCurrentIndex(self.history_combo.count() - 1)
                  found_active = True
                  
         if not found_active:
@@ -1727,7 +1836,7 @@ class MainWindow(QMainWindow):
              # Add it at the END or START? Usually original is oldest.
              # But our list is Newest First.
              # If "Original" is active, maybe it's not in history folder.
-             self.history_combo.addItem(f"Original Source (Active)", str(Path(current_path).absolute()))
+             self.history_combo.addItem(f"Original Source (Active)", current_abs)
              self.history_combo.setCurrentIndex(self.history_combo.count() - 1)
                  
         self.history_combo.setEnabled(True)
@@ -1737,7 +1846,7 @@ class MainWindow(QMainWindow):
         """Load selected version from history."""
         # Get data from selected item
         path = self.history_combo.currentData()
-        if path and Path(path).exists():
+        if path and os.path.isfile(path):
             # Load it (this triggers standard load pipeline)
             self.load_image(path)
 
@@ -1793,12 +1902,22 @@ class MainWindow(QMainWindow):
         )
         if path:
             try:
-                img = Image.open(path).convert('RGBA')
-                self.reference_image = img
-                # Pre-calculate pixmap
-                w, h = img.size
-                data = img.tobytes('raw', 'RGBA')
-                qimage = QImage(data, w, h, QImage.Format.Format_RGBA8888)
+                # Pre-calculate pixmap: decode straight into a QImage (one decode, one copy).
+                # The PIL copy is only needed for the comparative audit, so load it lazily.
+                reader = QImageReader(path)
+                reader.setAutoTransform(True)
+                qimage = reader.read()
+                if qimage.isNull():
+                    # Fall back to PIL for formats Qt cannot read
+                    img = ImageOps.exif_transpose(Image.open(path)).convert('RGBA')
+                    w, h = img.size
+                    data = img.tobytes('raw', 'RGBA')
+                    qimage = QImage(data, w, h, QImage.Format.Format_RGBA8888).copy()
+                    self.reference_image = img
+                else:
+                    qimage = qimage.convertToFormat(QImage.Format.Format_RGBA8888)
+                    self.reference_image = None
+                self.reference_path = path
                 self.reference_pixmap = QPixmap.fromImage(qimage)
                 
                 # Enable Split View
@@ -1847,12 +1966,25 @@ class MainWindow(QMainWindow):
                 base_pixmap = self.current_preview_pixmap
         
         if not base_pixmap:
+             self._last_refresh_key = None
              self.preview_label.setText("No Image")
              return
         
+        # 1. Skip no-op refreshes (same content, same zoom, same split)
+        viewport_size = self.preview_scroll.viewport().size()
+        refresh_key = (
+            self.btn_view_source.isChecked(),
+            self.btn_view_split.isChecked(),
+            self.btn_fit.isChecked(),
+            (viewport_size.width(), viewport_size.height()) if self.btn_fit.isChecked() else self.zoom_slider.value(),
+            (self.split_slider.value(), self.reference_pixmap.cacheKey() if self.reference_pixmap else 0) if is_split else -1,
+            base_pixmap.cacheKey()
+        )
+        if refresh_key == self._last_refresh_key:
+            return
+        
         # 2. Determine Target Size (Fit vs Zoom) -> logic remains same per-pixmap
         if self.btn_fit.isChecked():
-            viewport_size = self.preview_scroll.viewport().size()
             target_w = viewport_size.width() - 4
             target_h = viewport_size.height() - 4
             if target_w < 10: target_w = 300
@@ -1879,10 +2011,14 @@ class MainWindow(QMainWindow):
             
             # Create a composite QPixmap
             composite = QPixmap(scaled_pixmap.size())
-            composite.fill(Qt.GlobalColor.transparent)
+            if ref_scaled.size() != composite.size():
+                # Reference aspect differs, so the two halves won't cover everything
+                composite.fill(Qt.GlobalColor.transparent)
             
             from PyQt6.QtGui import QPainter
             painter = QPainter(composite)
+            # Halves don't overlap: write pixels directly instead of blending
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
             
             # Draw Reference (Full)
             # painter.drawPixmap(0, 0, ref_scaled)
@@ -1906,6 +2042,7 @@ class MainWindow(QMainWindow):
             painter.end()
             scaled_pixmap = composite
 
+        self._last_refresh_key = refresh_key
         self.preview_label.setPixmap(scaled_pixmap)
         self.preview_label.setText("")
 
@@ -2,24 +2,23 @@
 Network Discovery Script
 ========================
 
-This script performs parallel subnet scanning, identifies device types,
+This script performs concurrent subnet sweeps, identifies device types,
 retrieves MAC addresses, maps vendors using the Wireshark manuf file,
 and visualizes the network using Plotly.
 
 Requirements:
 -------------
-1. Install Nmap (CLI tool)
+1. Install Nmap (CLI tool, recommended)
    macOS  : brew install nmap
    Linux  : sudo apt install nmap
    Windows: https://nmap.org/download.html (add to PATH)
 
 2. Install Python packages:
-   pip install python-nmap tqdm requests plotly networkx
+   pip install tqdm requests numpy plotly networkx
 
-Note:
------
-Do NOT use `pip install nmap` — that package does not exist.
-Use `python-nmap`, which is the correct Python wrapper for the Nmap CLI tool.
+Each subnet is swept with a single `nmap -sn` run. Without Nmap, hosts are
+discovered with asyncio TCP connect probes instead; a refused connection
+still proves the host is up. Missing MAC addresses come from the ARP cache.
 
 Author: [Your Name]
 """
@@ -28,13 +27,20 @@ import os
 import re
 import sys
 import socket
+import asyncio
+import pickle
+import shutil
 import hashlib
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from functools import lru_cache
+from io import BytesIO
 from ipaddress import ip_network
 from tqdm import tqdm
 import requests
-import nmap
+from urllib3.util import make_headers
+import numpy as np
 import networkx as nx
 import plotly.graph_objects as go
 
@@ -42,28 +48,58 @@ import plotly.graph_objects as go
 MANUF_URL = "https://www.wireshark.org/download/automated/data/manuf"
 MANUF_FILE = "manuf"
 MANUF_HASH_FILE = "manuf_hash.txt"
+MANUF_CACHE_FILE = "manuf.pkl"
 NETS_FILE = "nets.txt"
-MAX_THREADS = 8
+PROBE_PORTS = (80, 443, 22)
+PROBE_TIMEOUT = 1.0
+MAX_PROBES = 512  # Concurrent TCP connects (keep well under the open-file limit)
+MANUF_SUB_BLOCKS = (36, 28)  # Mask lengths of manuf's finer-grained assignments
+MAC_SEPARATORS = str.maketrans('', '', ':-.')
+# manuf line: "<hex prefix>[/<mask>] <vendor...>" (comment and blank lines never match)
+MANUF_ENTRY_RE = re.compile(r"^([0-9A-Fa-f][0-9A-Fa-f:.-]*)(?:/(\d+))? +(\S[^\n]*)", re.M)
+# Vendor keywords -> device type, checked in priority order
+DEVICE_CLASSES = (
+    (re.compile(r"Apple"), "Mac/iPhone"),
+    (re.compile(r"Samsung|Huawei"), "Tablet/Phone"),
+    (re.compile(r"Microsoft|Windows|Lenovo|Dell|HP"), "PC"),
+)
 
 # Download and verify manuf file
 def get_file_hash(file_path):
-    sha256 = hashlib.sha256()
     with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+: hashed in C with the GIL released
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        sha256 = hashlib.sha256()
+        while chunk := f.read(1 << 20):
             sha256.update(chunk)
     return sha256.hexdigest()
 
-def download_manuf_file():
+# Stream the manuf file to disk, hashing it on the way; returns the SHA-256 or None
+def download_manuf_file(last_hash=None):
+    # Compressed transfer (gzip/deflate, plus br/zstd when installed);
+    # iter_content yields the decoded bytes, so the hash is unaffected
+    headers = make_headers(accept_encoding=True)
+    if last_hash and os.path.exists(MANUF_FILE):
+        # Unchanged upstream file -> empty 304 response
+        headers['If-Modified-Since'] = formatdate(os.path.getmtime(MANUF_FILE), usegmt=True)
     try:
-        response = requests.get(MANUF_URL)
-        response.raise_for_status()
-        with open(MANUF_FILE, 'wb') as f:
-            f.write(response.content)
+        with requests.get(MANUF_URL, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 304:
+                print("✅ Wireshark manuf file not modified upstream.")
+                return last_hash
+            sha256 = hashlib.sha256()
+            with open(MANUF_FILE + ".part", 'wb') as f:
+                for chunk in response.iter_content(65536):
+                    sha256.update(chunk)
+                    f.write(chunk)
+        os.replace(MANUF_FILE + ".part", MANUF_FILE)
         print("✅ Wireshark manuf file downloaded.")
-        return True
-    except requests.RequestException as e:
+        return sha256.hexdigest()
+    except (requests.RequestException, OSError) as e:
         print(f"❌ Error downloading manuf file: {e}")
-        return False
+        return None
 
 def check_and_download_manuf():
     last_hash = None
@@ -71,10 +107,10 @@ def check_and_download_manuf():
         with open(MANUF_HASH_FILE, 'r') as f:
             last_hash = f.read().strip()
 
-    if not download_manuf_file():
+    current_hash = download_manuf_file(last_hash)
+    if current_hash is None:
         return False
 
-    current_hash = get_file_hash(MANUF_FILE)
     if current_hash != last_hash:
         print("🔁 Manuf file has been updated.")
         with open(MANUF_HASH_FILE, 'w') as f:
@@ -83,109 +119,218 @@ def check_and_download_manuf():
         print("✔️ Manuf file is up to date.")
     return True
 
+# Parse manuf into integer-keyed lookups:
+#   24-bit OUIs         -> int prefix
+#   /28 and /36 blocks  -> (int prefix, mask bits)
 def parse_manuf_file():
     vendor_dict = {}
-    with open(MANUF_FILE, 'r') as file:
-        for line in file:
-            if line.startswith('#') or not line.strip():
-                continue
-            parts = line.strip().split()
-            if len(parts) < 2:
-                continue
-            mac_prefix = parts[0].lower()
-            vendor = " ".join(parts[1:])
-            vendor_dict[mac_prefix] = vendor
+    # One read + one C-level regex pass instead of strip/split per line
+    with open(MANUF_FILE, 'r', encoding='utf-8', errors='replace') as file:
+        text = file.read().replace('\t', ' ')
+    for prefix, mask, vendor in MANUF_ENTRY_RE.findall(text):
+        prefix = prefix.translate(MAC_SEPARATORS)
+        bits = int(mask) if mask else 24
+        key = int(prefix, 16) >> (len(prefix) * 4 - bits)
+        vendor_dict[key if bits == 24 else (key, bits)] = vendor.rstrip()
     return vendor_dict
 
-def get_vendor_from_mac(mac, vendor_dict):
-    if mac == 'N/A':
-        return "Unknown"
-    mac_prefix = ":".join(mac.lower().split(":")[0:3])
-    return vendor_dict.get(mac_prefix, "Unknown")
+# Reuse the pickled vendor lookup while the manuf file's hash is unchanged
+def load_vendor_dict():
+    current_hash = get_file_hash(MANUF_FILE)
+    try:
+        with open(MANUF_CACHE_FILE, 'rb') as f:
+            cached_hash, vendor_dict = pickle.load(f)
+        if cached_hash == current_hash:
+            return vendor_dict
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    vendor_dict = parse_manuf_file()
+    try:
+        with open(MANUF_CACHE_FILE, 'wb') as f:
+            pickle.dump((current_hash, vendor_dict), f, protocol=5)
+    except OSError as e:
+        print(f"⚠️ Could not cache parsed manuf file: {e}")
+    return vendor_dict
 
+# Build a MAC -> vendor resolver over vendor_dict, memoized per 24-bit OUI
+def make_vendor_resolver(vendor_dict):
+    # OUIs that are split into finer blocks can't be answered from the OUI alone
+    subdivided = {key[0] >> (key[1] - 24) for key in vendor_dict if isinstance(key, tuple)}
+
+    @lru_cache(maxsize=4096)
+    def vendor_for_oui(oui):
+        return vendor_dict.get(oui, "Unknown")
+
+    def get_vendor_from_mac(mac):
+        if mac == 'N/A':
+            return "Unknown"
+        try:
+            mac_int = int(mac.translate(MAC_SEPARATORS), 16)
+        except ValueError:
+            return "Unknown"
+        oui = mac_int >> 24
+        if oui in subdivided:
+            # Most specific assignment wins
+            for bits in MANUF_SUB_BLOCKS:
+                vendor = vendor_dict.get((mac_int >> (48 - bits), bits))
+                if vendor:
+                    return vendor
+        return vendor_for_oui(oui)
+
+    get_vendor_from_mac.cache_info = vendor_for_oui.cache_info
+    return get_vendor_from_mac
+
+@lru_cache(maxsize=256)
 def classify_device(vendor):
-    if "Apple" in vendor:
-        return "Mac/iPhone"
-    elif "Samsung" in vendor or "Huawei" in vendor:
-        return "Tablet/Phone"
-    elif "Microsoft" in vendor or "Windows" in vendor:
-        return "PC"
-    elif "Lenovo" in vendor or "Dell" in vendor or "HP" in vendor:
-        return "PC"
-    else:
-        return "Unknown"
+    for pattern, label in DEVICE_CLASSES:
+        if pattern.search(vendor):
+            return label
+    return "Unknown"
 
 def normalize_mac(mac):
     parts = mac.split(':')
     normalized_parts = [p.zfill(2) for p in parts]
     return ':'.join(normalized_parts)
 
-def get_mac_from_arp(ip):
+# One ARP cache entry: "? (10.0.0.1) at a:b:c:d:e:f" (POSIX) or "10.0.0.1  aa-bb-..." (Windows)
+ARP_ENTRY_RE = re.compile(r"\(?(\d{1,3}(?:\.\d{1,3}){3})\)?\s+(?:at\s+)?([a-f0-9]{1,2}(?:[:-][a-f0-9]{1,2}){5})", re.I)
+
+@lru_cache(maxsize=1)
+def load_arp_table():
+    command = ["arp", "-a"] if sys.platform == 'win32' else ["arp", "-an"]
     try:
-        output = subprocess.check_output(f"arp -n {ip}", shell=True).decode('utf-8')
-        mac_address = re.search(r"([a-f0-9]{1,2}[:-]){5}[a-f0-9]{1,2}", output, re.I)
-        if mac_address:
-            return normalize_mac(mac_address.group(0).lower())
-    except:
-        pass
-    return "N/A"
+        output = subprocess.check_output(command).decode('utf-8', errors='replace')
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    return {ip: normalize_mac(mac.lower().replace('-', ':')) for ip, mac in ARP_ENTRY_RE.findall(output)}
+
+def get_mac_from_arp(ip):
+    return load_arp_table().get(ip, "N/A")
 
+# One "<cidr> [wan]" per line; "wan" marks a routed target where ARP can't reach
 def read_subnets(file_path):
     subnets = []
     with open(file_path, 'r') as file:
         for line in file:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                subnets.append(line)
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                wan = any(flag.lower() == 'wan' for flag in fields[1:])
+                subnets.append((fields[0], wan))
     return subnets
 
-# Scan individual IP
-def scan_ip(ip, vendor_dict):
-    scanner = nmap.PortScanner()
-    try:
-        scanner.scan(hosts=str(ip), arguments='-sn')
-        if ip in scanner.all_hosts():
-            mac = scanner[ip]['addresses'].get('mac', get_mac_from_arp(str(ip)))
-            vendor = get_vendor_from_mac(mac, vendor_dict)
-            return {'ip': str(ip), 'mac': mac, 'vendor': vendor, 'type': classify_device(vendor)}
-    except Exception:
-        pass
-    return None
+# Probe a single port; a refused connection still means the host is up
+async def probe_port(ip, port, semaphore):
+    async with semaphore:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=PROBE_TIMEOUT)
+            writer.close()
+            return True
+        except ConnectionRefusedError:
+            return True
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+# Probe individual IP
+async def probe_ip(ip, semaphore):
+    results = await asyncio.gather(*(probe_port(ip, port, semaphore) for port in PROBE_PORTS))
+    return ip if any(results) else None
+
+# Probe every host of an IPv4 network concurrently on one event loop.
+# Hosts are walked as plain ints (same range as network.hosts()) by a fixed
+# pool of workers, so address strings and coroutines exist only while probed.
+async def sweep_network(network, desc):
+    semaphore = asyncio.Semaphore(MAX_PROBES)
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.prefixlen < 31:
+        first, last = first + 1, last - 1
+    host_ints = iter(range(first, last + 1))
+    alive = []
+
+    with tqdm(total=last - first + 1, desc=desc) as progress:
+        async def worker():
+            for n in host_ints:
+                ip = await probe_ip(socket.inet_ntoa(n.to_bytes(4, 'big')), semaphore)
+                if ip:
+                    alive.append(ip)
+                progress.update()
+
+        workers = max(1, MAX_PROBES // len(PROBE_PORTS))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    return alive
+
+# Sweep a whole subnet with one nmap ping scan and parse its XML report
+def nmap_sweep(subnet, arp_ping=True):
+    args = ["nmap", "-sn", "-n", "--min-rate", "5000", "-oX", "-"]
+    if not arp_ping:
+        # WAN targets: ARP only works on the local segment
+        args.append("--disable-arp-ping")
+    result = subprocess.run(args + [subnet], capture_output=True, check=True)
+
+    hosts = []
+    for _, elem in ET.iterparse(BytesIO(result.stdout)):
+        if elem.tag != 'host':
+            continue
+        status = elem.find('status')
+        if status is not None and status.get('state') == 'up':
+            ip = mac = None
+            for address in elem.iter('address'):
+                if address.get('addrtype') == 'mac':
+                    mac = address.get('addr')
+                else:
+                    ip = address.get('addr')
+            if ip:
+                hosts.append((ip, mac))
+        elem.clear()
+    return hosts
 
 # Main scanning routine per subnet
-def scan_subnet(subnet, vendor_dict):
+def scan_subnet(subnet, get_vendor_from_mac, arp_ping=True):
     print(f"\n🔍 Scanning subnet: {subnet}")
     found_devices = []
     network = ip_network(subnet, strict=False)
-    dead_count = 0
 
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        futures = {executor.submit(scan_ip, ip, vendor_dict): ip for ip in network.hosts()}
-        for future in tqdm(as_completed(futures), total=len(futures), desc=f"Scanning {subnet}"):
-            result = future.result()
-            if result:
-                found_devices.append(result)
-            else:
-                dead_count += 1
+    hosts = None
+    if shutil.which("nmap"):
+        try:
+            hosts = nmap_sweep(str(network), arp_ping)
+        except (OSError, subprocess.CalledProcessError, ET.ParseError) as e:
+            print(f"⚠️ nmap sweep failed ({e}), falling back to TCP probes.")
+    if hosts is None:
+        hosts = [(ip, None) for ip in asyncio.run(sweep_network(network, f"Scanning {subnet}"))]
+
+    # The sweep just refreshed the kernel ARP cache: re-read it once for this subnet
+    load_arp_table.cache_clear()
+    for ip, mac in hosts:
+        mac = mac or get_mac_from_arp(ip)
+        vendor = get_vendor_from_mac(mac)
+        found_devices.append({'ip': ip, 'mac': mac, 'vendor': vendor, 'type': classify_device(vendor), 'subnet': subnet})
 
     if len(found_devices) == 0:
         print(f"⚠️ Entire network {subnet} appears to be dead. Consider removing it.")
     return subnet, found_devices
 
 # Network graph visualization
+# Each subnet is a star around a synthetic hub; hubs are joined in a ring (O(N) edges)
 def visualize_network(all_devices):
     G = nx.Graph()
 
+    subnets = []
     for device in all_devices:
         ip = device['ip']
+        subnet = device['subnet']
+        if subnet not in G:
+            G.add_node(subnet, label=subnet, vendor="Subnet", type="Subnet")
+            subnets.append(subnet)
         G.add_node(ip, label=ip, vendor=device['vendor'], type=device['type'])
+        G.add_edge(subnet, ip)
 
-    for i, d1 in enumerate(all_devices):
-        for j, d2 in enumerate(all_devices):
-            if i < j:
-                G.add_edge(d1['ip'], d2['ip'])
+    if len(subnets) > 1:
+        for a, b in zip(subnets, subnets[1:] + subnets[:1]):
+            G.add_edge(a, b)
 
-    pos = nx.kamada_kawai_layout(G)
+    pos = nx.spring_layout(G, iterations=50, seed=42)
     node_x, node_y, node_text, node_colors = [], [], [], []
 
     for node, (x, y) in pos.items():
@@ -200,15 +345,19 @@ def visualize_network(all_devices):
             node_colors.append('green')
         elif info['type'] == "Tablet/Phone":
             node_colors.append('orange')
+        elif info['type'] == "Subnet":
+            node_colors.append('black')
         else:
             node_colors.append('gray')
 
-    edge_x, edge_y = [], []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x += [x0, x1, None]
-        edge_y += [y0, y1, None]
+    # Edge segments as flat [x0, x1, NaN, ...] arrays (NaN breaks the line in Plotly)
+    index = {node: i for i, node in enumerate(pos)}
+    coords = np.array(list(pos.values())).reshape(-1, 2)
+    edges = np.array([(index[a], index[b]) for a, b in G.edges()], dtype=np.intp).reshape(-1, 2)
+    edge_x = np.full(3 * len(edges), np.nan)
+    edge_y = np.full(3 * len(edges), np.nan)
+    edge_x[0::3], edge_y[0::3] = coords[edges[:, 0], 0], coords[edges[:, 0], 1]
+    edge_x[1::3], edge_y[1::3] = coords[edges[:, 1], 0], coords[edges[:, 1], 1]
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=node_x, y=node_y, mode='markers', text=node_text,
@@ -228,14 +377,14 @@ if __name__ == "__main__":
         sys.exit(1)
 
     check_and_download_manuf()
-    vendor_dict = parse_manuf_file()
+    get_vendor_from_mac = make_vendor_resolver(load_vendor_dict())
     subnets = read_subnets(NETS_FILE)
 
     all_devices = []
     summary = []
 
-    for subnet in subnets:
-        subnet, devices = scan_subnet(subnet, vendor_dict)
+    for subnet, wan in subnets:
+        subnet, devices = scan_subnet(subnet, get_vendor_from_mac, arp_ping=not wan)
         all_devices.extend(devices)
         summary.append((subnet, len(devices)))
 
@@ -2,16 +2,67 @@
 Core Conversion Logic for RedHerring.
 Handles Pillow operations for resizing, styling, and saving icons.
 """
-from PIL import Image, ImageDraw, ImageOps
+from PIL import Image, ImageChops, ImageDraw, ImageOps
 from pathlib import Path
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from core.postprocess import optimize_png
+
+# Concurrent encoders when writing a multi-file bundle (one per core)
+SAVE_WORKERS = os.cpu_count() or 4
+
+# Output file buffer: encoders write in small chunks, coalesce them into few syscalls
+SAVE_BUFFER = 1 << 20
+
+@lru_cache(maxsize=32)
+def rounded_mask(w: int, h: int, r: int) -> Image.Image:
+    """Rounded-rectangle 'L' mask, shared between calls. Callers must not modify it."""
+    mask = Image.new('L', (w, h), 0)
+    ImageDraw.Draw(mask).rounded_rectangle([(0, 0), (w, h)], radius=r, fill=255)
+    return mask
+
+def pack_opaque(img: Image.Image, mode: str) -> Image.Image:
+    """Convert a fully opaque RGBA mipmap to 'L' or adaptive-palette 'P'.
+    Images with any transparency are returned unchanged."""
+    if img.mode == 'RGBA' and img.getchannel('A').getextrema() != (255, 255):
+        return img
+    if mode == 'P':
+        return img.convert('RGB').convert('P', palette=Image.Palette.ADAPTIVE)
+    return img.convert(mode)
+
+def contain_size(size: tuple, target: tuple) -> tuple:
+    """Content size ImageOps.contain gives an image of `size` inside `target`."""
+    (w, h), (tw, th) = size, target
+    if w / h > tw / th:
+        return tw, round(h / w * tw)
+    if w / h < tw / th:
+        return round(w / h * th), th
+    return tw, th
+
+def fit_box(size: tuple, target: tuple) -> tuple:
+    """Centered crop box ImageOps.fit takes from an image of `size` to fill `target`."""
+    (w, h), (tw, th) = size, target
+    if w / h > tw / th:
+        cw, ch = tw / th * h, h
+    elif w / h < tw / th:
+        cw, ch = w, w / (tw / th)
+    else:
+        cw, ch = w, h
+    left, top = (w - cw) * 0.5, (h - ch) * 0.5
+    return (left, top, left + cw, top + ch)
 
 class IconConverter:
     @staticmethod
     def process_image(img: Image.Image, options: dict) -> Image.Image:
         """
         Apply transformations: Rotate -> Crop -> Style -> Resize.
+        Returns img itself when no step applies.
         """
-        processed = img.copy()
+        # No up-front copy: every step below returns a new image, and the
+        # in-place alpha step only runs on an image we already own.
+        processed = img
         
         # 1. Edit (Rotate/Flip would happen here if stored in options)
         # For now, we assume the UI handles rotation on the source object directly
@@ -34,36 +85,37 @@ class IconConverter:
         # 4. Background Fill
         # If 'fill_background' is true, we create a new image with that color
         if options.get('fill_background'):
-            bg_color = options.get('background_color', (255, 255, 255))
-            bg = Image.new("RGBA", processed.size, bg_color + (255,))
-            # Composite: Paste processed over background
-            # If processed has alpha, use it as mask
-            bg.alpha_composite(processed)
-            processed = bg
+            if processed.mode != "RGBA":
+                processed = processed.convert("RGBA")
+            # Fully opaque images would cover the background completely: skip the canvas
+            if processed.getextrema()[3] != (255, 255):
+                bg_color = options.get('background_color', (255, 255, 255))
+                bg = Image.new("RGBA", processed.size, bg_color + (255,))
+                # Composite: Paste processed over background
+                # If processed has alpha, use it as mask
+                bg.alpha_composite(processed)
+                processed = bg
             
         # 5. Rounded Corners
         radius_percent = options.get('radius', 0)
         if radius_percent > 0:
-            # Create mask
-            mask = Image.new('L', processed.size, 0)
-            draw = ImageDraw.Draw(mask)
-            
+            if processed is img:
+                processed = img.copy() # putalpha works in place
+                
             w, h = processed.size
             # Radius is percentage of half-width (0-100 -> 0-w/2)
             r = int((min(w, h) / 2) * (radius_percent / 100))
             
-            draw.rounded_rectangle([(0, 0), (w, h)], radius=r, fill=255)
+            # Cached mask (putalpha only reads it)
+            mask = rounded_mask(w, h, r)
             
             # Apply mask
-            # If image already has alpha, we must multiply
+            # If image already has alpha, keep the intersection: min(current, mask)
             if 'A' in processed.getbands():
                 current_alpha = processed.getchannel('A')
-                # Intersection of both masks
-                # Easy way: putalpha replaces it. We want: min(current, new)
-                # But typically rounding cuts into it.
-                processed.putalpha(mask) # This replaces existing alpha
-            else:
-                processed.putalpha(mask)
+                if current_alpha.getextrema() != (255, 255):
+                    mask = ImageChops.darker(current_alpha, mask)
+            processed.putalpha(mask)
                 
         return processed
 
@@ -72,6 +124,9 @@ class IconConverter:
         """
         Save the processed image to the specified formats with resizing logic.
         options['resize_to_aspect']: True (default) = Contain/Fit, False = Crop/Fill
+        options['png_fast']: True (default) = fast zlib level for PNG output, False = Pillow default
+        options['output_mode']: 'L' or 'P' = store opaque mipmaps in that mode (not ICNS), None (default) = RGBA
+        options['optimize_png']: True = recompress written PNG files with pngquant/optipng, False (default) = off
         """
         path = Path(path)
         base_name = path.stem
@@ -87,7 +142,11 @@ class IconConverter:
         use_contain = options.get('resize_to_aspect', True)
         
         # 1. Generate Mipmaps
+        # Sizes run largest first, so each mipmap is downscaled from the previous
+        # one whenever that still holds enough pixels (a pyramid, not N full-res resizes).
+        # Output sizes and crop boxes always come from img, so rounding never compounds.
         mipmaps = []
+        prev = prev_box = None
         for s in sizes:
             # Determine target dimensions
             if isinstance(s, tuple):
@@ -97,41 +156,81 @@ class IconConverter:
                 
             if use_contain:
                 # Sacrosanct: Fit INSIDE target rect with transparent padding
-                # Create canvas of target size
-                canvas = Image.new("RGBA", (tw, th), (0, 0, 0, 0))
-                
-                # Resize image to fit within tw x th
-                res = ImageOps.contain(img.copy(), (tw, th), Image.Resampling.LANCZOS)
-                
-                # Center it
-                x = (tw - res.width) // 2
-                y = (th - res.height) // 2
-                canvas.paste(res, (x, y))
-                mipmaps.append(canvas)
+                w, h = contain_size(img.size, (tw, th))
+                box = (0, 0, img.width, img.height)
             else:
                 # Crop/Fill: Fill the target rect, cropping edges
-                res = ImageOps.fit(img.copy(), (tw, th), Image.Resampling.LANCZOS)
+                w, h = tw, th
+                box = fit_box(img.size, (tw, th))
+                
+            # Resample from the previous mipmap if it covers this box at no lower density
+            src, src_box = img, box
+            if prev is not None:
+                sx = prev.width / (prev_box[2] - prev_box[0])
+                sy = prev.height / (prev_box[3] - prev_box[1])
+                inside = (prev_box[0] <= box[0] and prev_box[1] <= box[1]
+                          and box[2] <= prev_box[2] and box[3] <= prev_box[3])
+                if inside and (box[2] - box[0]) * sx >= w and (box[3] - box[1]) * sy >= h:
+                    src = prev
+                    src_box = ((box[0] - prev_box[0]) * sx, (box[1] - prev_box[1]) * sy,
+                               (box[2] - prev_box[0]) * sx, (box[3] - prev_box[1]) * sy)
+                    
+            # Box-reduce much larger sources first so LANCZOS only sees ~2x the target.
+            # Only a prefilter: reduce() rounds its size up, so the box is mapped by the exact
+            # factor rather than resampling the whole (slightly off-aspect) reduced image.
+            factor = int(min((src_box[2] - src_box[0]) / w, (src_box[3] - src_box[1]) / h)) // 2
+            if factor > 1:
+                src = src.reduce(factor)
+                src_box = tuple(c / factor for c in src_box)
+                
+            res = src.resize((w, h), Image.Resampling.LANCZOS, box=src_box)
+            prev, prev_box = res, box
+            
+            if res.size == (tw, th):
+                # Already fills the target: no padding needed
                 mipmaps.append(res)
+                continue
+                
+            # Create canvas of target size
+            canvas = Image.new("RGBA", (tw, th), (0, 0, 0, 0))
+            
+            # Center it
+            x = (tw - res.width) // 2
+            y = (th - res.height) // 2
+            canvas.paste(res, (x, y))
+            mipmaps.append(canvas)
+            
+        # Grayscale/indexed sources: opaque sizes don't need 4 channels
+        packed = mipmaps
+        if options.get('output_mode') in ('L', 'P'):
+            packed = [pack_opaque(m, options['output_mode']) for m in mipmaps]
             
         # 2. Save Formats
+        # Collect (image, path, format, params) jobs, then encode them concurrently:
+        # Pillow releases the GIL inside its encoders.
+        jobs = []
         if 'ico' in formats:
-            base_img = mipmaps[0]
-            other_images = mipmaps[1:] if len(mipmaps) > 1 else []
-            base_img.save(path, format='ICO', append_images=other_images)
+            base_img = packed[0]
+            other_images = packed[1:] if len(packed) > 1 else []
+            # Explicit sizes: Pillow's default list would drop non-standard sizes (e.g. 96)
+            # and could thumbnail extra ones we didn't render
+            jobs.append((base_img, path, 'ICO', {'append_images': other_images, 'sizes': [m.size for m in packed]}))
             
         if 'icns' in formats:
             base_img = mipmaps[0]
             other_images = mipmaps[1:] if len(mipmaps) > 1 else []
-            base_img.save(path.with_suffix('.icns'), format='ICNS', append_images=other_images)
+            jobs.append((base_img, path.with_suffix('.icns'), 'ICNS', {'append_images': other_images}))
             
         if 'png' in formats:
-            if len(mipmaps) == 1:
-                mipmaps[0].save(path, "PNG")
+            # Small icons barely shrink at higher zlib levels; level 1 is several times faster
+            png_params = {'compress_level': 1} if options.get('png_fast', True) else {}
+            if len(packed) == 1:
+                jobs.append((packed[0], path, "PNG", png_params))
             else:
                 png_dir = output_dir / f"{base_name}_pngs"
                 png_dir.mkdir(exist_ok=True)
-                for m in mipmaps:
-                    m.save(png_dir / f"{base_name}_{m.width}x{m.height}.png")
+                for m in packed:
+                    jobs.append((m, png_dir / f"{base_name}_{m.width}x{m.height}.png", "PNG", png_params))
                 
         if 'bmp' in formats:
             # Similar to PNG: if multiple, folder. If single, maybe just file?
@@ -140,11 +239,33 @@ class IconConverter:
             # The prompt implies user might want single file.
             # Let's do: If 1 size -> Path. If >1 -> Folder.
             
-            if len(mipmaps) == 1:
+            if len(packed) == 1:
                 # Save single file
-                mipmaps[0].save(path, "BMP")
+                jobs.append((packed[0], path, "BMP", {}))
             else:
                 bmp_dir = output_dir / f"{base_name}_bmps"
                 bmp_dir.mkdir(exist_ok=True)
-                for m in mipmaps:
-                    m.save(bmp_dir / f"{base_name}_{m.width}x{m.height}.bmp")
+                for m in packed:
+                    jobs.append((m, bmp_dir / f"{base_name}_{m.width}x{m.height}.bmp", "BMP", {}))
+                    
+        optimize = options.get('optimize_png', False)
+        
+        def save_job(job):
+            try:
+                with open(job[1], 'wb', buffering=SAVE_BUFFER) as f:
+                    job[0].save(f, job[2], **job[3])
+            except Exception:
+                # Pillow only cleans up partial files when given a path
+                Path(job[1]).unlink(missing_ok=True)
+                raise
+            # Runs in the same worker, overlapping the other encodes
+            if optimize and job[2] == "PNG":
+                optimize_png(job[1])
+            
+        if len(jobs) == 1:
+            # Single container/file: nothing to overlap, skip the pool
+            save_job(jobs[0])
+        elif jobs:
+            with ThreadPoolExecutor(max_workers=min(SAVE_WORKERS, len(jobs))) as executor:
+                # list() re-raises the first failed save
+                list(executor.map(save_job, jobs))
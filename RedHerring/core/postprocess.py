@@ -0,0 +1,29 @@
+"""
+Optional post-processing for RedHerring output files.
+Recompresses written PNGs with pngquant or optipng when either is on PATH.
+"""
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Optional
+
+@lru_cache(maxsize=1)
+def png_optimizer() -> Optional[list]:
+    """Command prefix of the available PNG optimizer, or None.
+    pngquant (lossy palette, only kept if smaller) is preferred, optipng (lossless) is the fallback."""
+    exe = shutil.which('pngquant')
+    if exe:
+        return [exe, '--quality=70-95', '--skip-if-larger', '--force', '--ext', '.png']
+    exe = shutil.which('optipng')
+    if exe:
+        return [exe, '-o2', '-quiet']
+    return None
+
+def optimize_png(path) -> bool:
+    """Recompress a PNG file in place. Returns False if no optimizer is installed."""
+    cmd = png_optimizer()
+    if cmd is None:
+        return False
+    # Non-zero exits (e.g. pngquant skipping a file it can't shrink) leave the original
+    subprocess.run(cmd + [str(path)], capture_output=True, check=False)
+    return True
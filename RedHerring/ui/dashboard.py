@@ -8,17 +8,99 @@ from PyQt6.QtGui import (
 )
 from PyQt6.QtGui import QIcon, QAction, QPixmap, QImage, QDesktopServices, QColor, QBrush
 from PyQt6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QScrollArea, QGroupBox, 
+    QMainWindow, QWidget, QVBoxLayout, QScrollArea,
     QLabel, QPushButton, QFileDialog, QHBoxLayout, QSlider, 
     QCheckBox, QComboBox, QGridLayout, QColorDialog, QApplication,
-    QTableWidget, QTableWidgetItem, QHeaderView, QLineEdit
+    QTableWidget, QTableWidgetItem, QHeaderView, QLineEdit, QMessageBox, QProgressBar
 )
-from PyQt6.QtCore import Qt, QSize, QRect, QUrl
+from PyQt6.QtCore import Qt, QSize, QRect, QUrl, QTimer, QSignalBlocker, QThread, pyqtSignal
+from contextlib import contextmanager
+import math
 from pathlib import Path
 from PIL import Image, ImageOps
+import numpy as np
 
+from core.converter import IconConverter
+from core.postprocess import png_optimizer
 from ui.widgets import InteractiveImageLabel, CollapsibleBox, InfoLabel
 
+# JPEG sources are decoded at the smallest DCT scale (1/2, 1/4, 1/8) that still
+# covers this size; 4x the largest standard icon (1024), so exports don't suffer
+SOURCE_DECODE_MAX = 4096
+
+# Icon Preview label edge (px)
+PREVIEW_SIZE = 128
+
+# Longest side of the pixmap handed to the crop widget (display only; crops/exports stay full-res)
+WIDGET_PREVIEW_MAX = 1600
+
+# Smallest level of the preview pyramid (Icon Preview crops of large selections)
+PREVIEW_SOURCE_MAX = 512
+
+@contextmanager
+def batch_updates(table):
+    """Bulk-edit a table view: no repaints or signals until the block exits, then one repaint."""
+    table.setUpdatesEnabled(False)
+    blocker = QSignalBlocker(table)
+    try:
+        yield
+    finally:
+        blocker.unblock()
+        table.setUpdatesEnabled(True)
+        table.viewport().update()
+
+@contextmanager
+def blocked(*widgets):
+    """Block signals of several widgets for the duration of the block."""
+    blockers = [QSignalBlocker(w) for w in widgets]
+    try:
+        yield
+    finally:
+        for blocker in blockers:
+            blocker.unblock()
+
+def array_to_pixmap(arr: np.ndarray) -> QPixmap:
+    """Wrap an HxWx4 RGBA array in a QImage (no copy) and upload it as a QPixmap."""
+    qim = QImage(arr.data, arr.shape[1], arr.shape[0], arr.strides[0], QImage.Format.Format_RGBA8888)
+    # Always QPixmap.fromImage: QPixmap(qim) goes through PyQt's slower emulated constructor.
+    # fromImage copies the pixels, so arr only has to outlive this call. It also converts
+    # to the native premultiplied format once, here; paints reuse that (cheaper than numpy).
+    return QPixmap.fromImage(qim)
+
+class ConvertThread(QThread):
+    """Background thread for styling and saving the full-resolution crop."""
+    
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, image, path, formats, sizes, options):
+        super().__init__()
+        self.image = image
+        self.path = path
+        self.formats = formats
+        self.sizes = sizes
+        self.options = options
+    
+    def run(self):
+        """Process and save off the GUI thread."""
+        try:
+            self.progress.emit(10)
+            final_img = IconConverter.process_image(self.image, self.options)
+            self.progress.emit(40)
+            IconConverter.save_icon(final_img, self.path, self.formats, self.sizes, options=self.options)
+            self.progress.emit(100)
+            self.finished.emit(True, self.path)
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+# Clockwise edit rotation (degrees) -> lossless transpose
+# (Transpose.ROTATE_* turn counter-clockwise, hence 90 <-> 270)
+ROTATE_TRANSPOSE = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
 class DashboardWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -26,14 +108,43 @@ class DashboardWindow(QMainWindow):
         self.resize(1100, 800)
         self.setMinimumSize(900, 650)
         
-        self.source_image = None
+        self.source_image = None      # PIL view over _source_np (shares its buffer)
+        self._source_np = None        # Canonical source pixels: HxWx4 uint8 RGBA
+        self._src_mode = "RGBA"       # Mode of the loaded file (output_mode for L/P sources)
+        self._color_dlg = None        # Background colour dialog, created on first use
         self.processed_image = None
+        self.convert_worker = None    # Running export (one at a time)
         
         # Edit State
         self.rotation = 0
         self.flip_h = False
         self.flip_v = False
         self.source_image_transformed = None
+        self._transformed_np = None   # RGBA array of the transformed source (preview crops)
+        self._transformed_pix = None  # Widget pixmap built from that array
+        self._preview_levels = []     # [(array, scale vs full-res)], full-res first, shrinking
+        self._last_transform_key = None # (rotation, flip_h, flip_v) the above were built for
+        self._last_preview_key = None  # Pixels currently shown in the Icon Preview
+        self._preview_input_key = None # Selection, drag state and options of the last render
+        self._crop_cache_key = None    # Selection rect of the cached preview crop
+        self._last_quality_rect = None # Selection the size table was last colour-coded for
+        self._crop_cache_img = None    # That crop, already thumbnailed (styling input)
+        
+        # Coalesce bursts of preview requests (slider drags, spin/selection changes)
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(30)
+        self._preview_timer.timeout.connect(self._do_update_preview)
+        
+        # Size table text colours (shared, not rebuilt per row)
+        self._brush_gray = QBrush(QColor("gray"))
+        self._brush_black = QBrush(QColor("black"))
+        self._brush_red = QBrush(QColor("red"))
+        
+        # Widgets the preview reads; None until init_ui builds them
+        self.preview_label = None
+        self.chk_resize_ar = None
+        self.slider_round = None
         
         self.init_ui()
         
@@ -93,6 +204,7 @@ class DashboardWindow(QMainWindow):
         self.image_label.setMinimumHeight(400) # Give it room
         self.image_label.setStyleSheet("border: 2px dashed #ccc; background: #333;")
         self.image_label.selectionChanged.connect(self.on_selection_changed)
+        self.image_label.dragFinished.connect(self.update_preview) # Settled, full-quality frame
         
         layout.addWidget(self.image_label)
         
@@ -234,8 +346,11 @@ class DashboardWindow(QMainWindow):
         self.size_table.verticalHeader().setVisible(False)
         self.size_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         
+        sizes = [16, 24, 32, 48, 64, 96, 128, 256, 512, 1024]
+        # Size the table once (dynamic row + standard sizes), then fill cells
+        self.size_table.setRowCount(1 + len(sizes))
+        
         # Dynamic Row (Index 0)
-        self.size_table.insertRow(0)
         chk = QTableWidgetItem()
         chk.setCheckState(Qt.CheckState.Checked)
         chk.setToolTip("Export the current crop size")
@@ -247,17 +362,14 @@ class DashboardWindow(QMainWindow):
         w_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable) # No edit
         h_item = QTableWidgetItem("0")
         h_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+        # Sizes are also kept as ints (UserRole) so table scans never re-parse text
+        w_item.setData(Qt.ItemDataRole.UserRole, 0)
+        h_item.setData(Qt.ItemDataRole.UserRole, 0)
         
         self.size_table.setItem(0, 1, w_item)
         self.size_table.setItem(0, 2, h_item)
         
-        sizes = [16, 24, 32, 48, 64, 96, 128, 256, 512, 1024]
-        # self.size_table.setRowCount(len(sizes)) # Don't pre-set, we append
-        
-        for size in sizes:
-            row = self.size_table.rowCount()
-            self.size_table.insertRow(row)
-            
+        for row, size in enumerate(sizes, start=1):
             # Checkbox
             chk = QTableWidgetItem()
             chk.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
@@ -269,12 +381,13 @@ class DashboardWindow(QMainWindow):
             w_item.setFlags(Qt.ItemFlag.ItemIsEnabled)
             h_item = QTableWidgetItem(str(size))
             h_item.setFlags(Qt.ItemFlag.ItemIsEnabled)
+            w_item.setData(Qt.ItemDataRole.UserRole, size)
+            h_item.setData(Qt.ItemDataRole.UserRole, size)
             
             self.size_table.setItem(row, 1, w_item)
             self.size_table.setItem(row, 2, h_item)
             
-        self.left_layout.addWidget(self.size_table)
-        
+        self.size_table.itemChanged.connect(self.on_size_item_edited)
         self.left_layout.addWidget(self.size_table)
         
         # Add Custom Size Row (Integrated)
@@ -323,7 +436,7 @@ class DashboardWindow(QMainWindow):
         prev_box = QVBoxLayout()
         prev_box.addWidget(QLabel("Icon Preview"))
         self.preview_label = QLabel()
-        self.preview_label.setFixedSize(128, 128)
+        self.preview_label.setFixedSize(PREVIEW_SIZE, PREVIEW_SIZE)
         self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.preview_label.setStyleSheet("border: 1px solid #ccc; background-color: #f5f5f5; border-radius: 4px;")
         prev_box.addWidget(self.preview_label)
@@ -346,7 +459,6 @@ class DashboardWindow(QMainWindow):
         
         # Background
         bg_box = QHBoxLayout()
-        self.bg_group = QGroupBox() # Invisible container for logic
         self.chk_bg = QCheckBox("Fill Background") # Reusing name for compatibility
         self.chk_bg.toggled.connect(self.update_preview)
         
@@ -354,7 +466,7 @@ class DashboardWindow(QMainWindow):
         self.btn_bg_color.setFixedSize(24, 24)
         self.btn_bg_color.setStyleSheet("background-color: white; border: 1px solid #ccc;")
         self.bg_color = (255, 255, 255)
-        self.btn_bg_color.clicked.connect(lambda: [self.pick_color(), self.update_preview()])
+        self.btn_bg_color.clicked.connect(self.pick_color)
 
         
         bg_box.addWidget(self.chk_bg)
@@ -371,6 +483,11 @@ class DashboardWindow(QMainWindow):
         self.combo_output_fmt.setCurrentText("ICO") 
         self.combo_output_fmt.currentTextChanged.connect(self.toggle_ico_constraints)
         fmt_box.addWidget(self.combo_output_fmt)
+        
+        self.chk_optimize_png = QCheckBox("Optimize PNG files")
+        self.chk_optimize_png.setToolTip("Recompress PNG output with pngquant (or optipng). Slower saves, smaller files.")
+        self.chk_optimize_png.setEnabled(png_optimizer() is not None) # Needs either tool on PATH
+        fmt_box.addWidget(self.chk_optimize_png)
         self.right_layout.addLayout(fmt_box)
         
         self.right_layout.addStretch()
@@ -412,10 +529,13 @@ class DashboardWindow(QMainWindow):
         # Width/Height (Editable)
         w_item = QTableWidgetItem(str(w))
         h_item = QTableWidgetItem(str(h))
-        # Default flags allow editing
+        w_item.setData(Qt.ItemDataRole.UserRole, w)
+        h_item.setData(Qt.ItemDataRole.UserRole, h)
+        # Default flags allow editing (on_size_item_edited keeps UserRole in sync)
         
-        self.size_table.setItem(row, 1, w_item)
-        self.size_table.setItem(row, 2, h_item)
+        with QSignalBlocker(self.size_table): # Not a user edit
+            self.size_table.setItem(row, 1, w_item)
+            self.size_table.setItem(row, 2, h_item)
         
         # Delete Button
         btn_del = QPushButton("-") # Request: "-" over red button
@@ -444,6 +564,14 @@ class DashboardWindow(QMainWindow):
         # Immediate Validation (check constraints)
         self.toggle_ico_constraints(self.combo_output_fmt.currentText())
 
+    def on_size_item_edited(self, item):
+        """Re-parse a width/height cell once, when the user edits it."""
+        if item.column() not in (1, 2): return
+        text = item.text()
+        with batch_updates(self.size_table):
+            item.setData(Qt.ItemDataRole.UserRole, int(text) if text.isdigit() else None)
+        self.toggle_ico_constraints(self.combo_output_fmt.currentText())
+
     def delete_custom_row(self):
         btn = self.sender()
         if not btn: return
@@ -454,20 +582,21 @@ class DashboardWindow(QMainWindow):
         index = self.size_table.indexAt(btn.pos())
         if index.isValid():
             self.size_table.removeRow(index.row())
-            self.check_resolution_quality()
+            self.check_resolution_quality(force=True)
 
     def toggle_ico_constraints(self, format_text):
         """Disable sizes > 256 for ICO."""
         is_ico = (format_text == "ICO")
         
-        for row in range(self.size_table.rowCount()):
-            try:
+        with batch_updates(self.size_table):
+            for row in range(self.size_table.rowCount()):
                 w_item = self.size_table.item(row, 1)
                 h_item = self.size_table.item(row, 2)
                 chk_item = self.size_table.item(row, 0)
                 
-                w = int(w_item.text())
-                h = int(h_item.text())
+                w = w_item.data(Qt.ItemDataRole.UserRole)
+                h = h_item.data(Qt.ItemDataRole.UserRole)
+                if w is None or h is None: continue
                 size = max(w, h)
                 
                 if is_ico and size > 256:
@@ -475,10 +604,8 @@ class DashboardWindow(QMainWindow):
                     chk_item.setCheckState(Qt.CheckState.Unchecked)
                     chk_item.setFlags(Qt.ItemFlag.NoItemFlags) # Disable interaction
                     
-                    color = QColor("gray")
-                    brush = QBrush(color)
-                    w_item.setForeground(brush)
-                    h_item.setForeground(brush)
+                    w_item.setForeground(self._brush_gray)
+                    h_item.setForeground(self._brush_gray)
                     
                     chk_item.setToolTip("ICO format supports max 256x256.")
                 else:
@@ -488,16 +615,13 @@ class DashboardWindow(QMainWindow):
                     
                     # Restore color (or let check_resolution_quality handle it?)
                     # We should probably reset to black, then run check_resolution_quality
-                    brush = QBrush(QColor("black"))
-                    w_item.setForeground(brush)
-                    h_item.setForeground(brush)
+                    w_item.setForeground(self._brush_black)
+                    h_item.setForeground(self._brush_black)
                     chk_item.setToolTip("")
                     
-            except ValueError:
-                pass
         
         # Re-run quality check to re-apply red if upscaling (overrides black/gray?)
-        self.check_resolution_quality()
+        self.check_resolution_quality(force=True)
 
     def create_download_section(self):
         # We'll use a plain widget area for the download action
@@ -519,28 +643,24 @@ class DashboardWindow(QMainWindow):
         self.convert_btn.setEnabled(False) # Enabled when image loaded
         self.convert_btn.clicked.connect(self.convert_image)
         
+        self.convert_progress = QProgressBar()
+        self.convert_progress.setVisible(False) # Shown while an export runs
+        self.convert_progress.setMaximumWidth(200)
+        
         layout.addStretch()
         layout.addWidget(self.convert_btn)
+        layout.addWidget(self.convert_progress)
         layout.addStretch()
         
         self.layout.addWidget(container)
 
     def on_selection_changed(self, rect: QRect):
         """Called when widget selection changes (mouse drag)."""
-        self.spin_left.blockSignals(True)
-        self.spin_top.blockSignals(True)
-        self.spin_width.blockSignals(True)
-        self.spin_height.blockSignals(True)
-        
-        self.spin_left.setValue(rect.x())
-        self.spin_top.setValue(rect.y())
-        self.spin_width.setValue(rect.width())
-        self.spin_height.setValue(rect.height())
-        
-        self.spin_left.blockSignals(False)
-        self.spin_top.blockSignals(False)
-        self.spin_width.blockSignals(False)
-        self.spin_height.blockSignals(False)
+        with blocked(self.spin_left, self.spin_top, self.spin_width, self.spin_height):
+            self.spin_left.setValue(rect.x())
+            self.spin_top.setValue(rect.y())
+            self.spin_width.setValue(rect.width())
+            self.spin_height.setValue(rect.height())
         
         self.update_preview()
 
@@ -556,10 +676,15 @@ class DashboardWindow(QMainWindow):
         self.update_preview()
 
     def pick_color(self):
-        color = QColorDialog.getColor()
-        if color.isValid():
+        # One dialog, built on first use and reused afterwards
+        if self._color_dlg is None:
+            self._color_dlg = QColorDialog(self)
+        self._color_dlg.setCurrentColor(QColor(*self.bg_color))
+        if self._color_dlg.exec():
+            color = self._color_dlg.currentColor()
             self.bg_color = (color.red(), color.green(), color.blue())
             self.btn_bg_color.setStyleSheet(f"background-color: {color.name()}; border: 1px solid #ccc;")
+            self.update_preview() # Cancelled dialog: nothing to re-render
 
     def on_ar_changed(self, text):
         mode = "Free"
@@ -567,44 +692,50 @@ class DashboardWindow(QMainWindow):
         elif text == "Original Ratio": mode = "Original"
         self.image_label.set_aspect_ratio_mode(mode)
 
-    def check_resolution_quality(self):
-        """Color code sizes if they exceed source selection."""
+    def check_resolution_quality(self, force=False):
+        """Color code sizes if they exceed source selection.
+        Skipped when the selection is unchanged, unless force (rows/format changed)."""
         rect = self.image_label.selection_rect.toRect()
         if rect.width() <= 0: return
+        if not force and rect == self._last_quality_rect: return
+        self._last_quality_rect = rect
         
         # Update Dynamic Row (Row 0)
-        start_row = 1
-        # Careful: if table empty? (init)
-        if self.size_table.rowCount() > 0:
-            # We assume row 0 is dynamic
-            self.size_table.item(0, 1).setText(str(rect.width()))
-            self.size_table.item(0, 2).setText(str(rect.height()))
-            # Update Tooltip?
-            self.size_table.item(0, 0).setToolTip(f"Export selection: {rect.width()}x{rect.height()}")
+        with batch_updates(self.size_table):
+            start_row = 1
+            # Careful: if table empty? (init)
+            if self.size_table.rowCount() > 0:
+                # We assume row 0 is dynamic
+                self.size_table.item(0, 1).setText(str(rect.width()))
+                self.size_table.item(0, 2).setText(str(rect.height()))
+                self.size_table.item(0, 1).setData(Qt.ItemDataRole.UserRole, rect.width())
+                self.size_table.item(0, 2).setData(Qt.ItemDataRole.UserRole, rect.height())
+                # Update Tooltip?
+                self.size_table.item(0, 0).setToolTip(f"Export selection: {rect.width()}x{rect.height()}")
             
-            # Enforce ICO constraint for dynamic row immediately
-            if self.combo_output_fmt.currentText() == "ICO":
-                size = max(rect.width(), rect.height())
-                chk_item = self.size_table.item(0, 0)
-                if size > 256:
-                     chk_item.setCheckState(Qt.CheckState.Unchecked)
-                     chk_item.setFlags(Qt.ItemFlag.NoItemFlags)
-                     chk_item.setToolTip("ICO format supports max 256x256.")
-                else:
-                     # Re-enable if it was disabled (but don't force check? or restore?)
-                     # If user had it checked, maybe check it? Or just enable.
-                     chk_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-                     # If we just re-enabled, maybe check it by default?
-                     if chk_item.checkState() == Qt.CheckState.Unchecked:
-                         chk_item.setCheckState(Qt.CheckState.Checked)
-
-        for row in range(start_row, self.size_table.rowCount()):
-            try:
+                # Enforce ICO constraint for dynamic row immediately
+                if self.combo_output_fmt.currentText() == "ICO":
+                    size = max(rect.width(), rect.height())
+                    chk_item = self.size_table.item(0, 0)
+                    if size > 256:
+                         chk_item.setCheckState(Qt.CheckState.Unchecked)
+                         chk_item.setFlags(Qt.ItemFlag.NoItemFlags)
+                         chk_item.setToolTip("ICO format supports max 256x256.")
+                    else:
+                         # Re-enable if it was disabled (but don't force check? or restore?)
+                         # If user had it checked, maybe check it? Or just enable.
+                         chk_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+                         # If we just re-enabled, maybe check it by default?
+                         if chk_item.checkState() == Qt.CheckState.Unchecked:
+                             chk_item.setCheckState(Qt.CheckState.Checked)
+
+            for row in range(start_row, self.size_table.rowCount()):
                 w_item = self.size_table.item(row, 1)
                 h_item = self.size_table.item(row, 2)
                 
-                w = int(w_item.text())
-                h = int(h_item.text())
+                w = w_item.data(Qt.ItemDataRole.UserRole)
+                h = h_item.data(Qt.ItemDataRole.UserRole)
+                if w is None or h is None: continue
                 
                 # Check upscale
                 is_upscale = (w > rect.width()) or (h > rect.height())
@@ -615,21 +746,22 @@ class DashboardWindow(QMainWindow):
                 # If disabled, maybe we don't care about upscale warning?
                 
                 chk_item = self.size_table.item(row, 0)
+                warn = False
                 if not (chk_item.flags() & Qt.ItemFlag.ItemIsEnabled):
-                    color = QColor("gray")
+                    brush = self._brush_gray
+                elif is_upscale:
+                    brush = self._brush_red
+                    warn = True
                 else:
-                    color = QColor("red") if is_upscale else QColor("black")
+                    brush = self._brush_black
                 
-                brush = QBrush(color)
                 w_item.setForeground(brush)
                 h_item.setForeground(brush)
                 
-                if color == QColor("red"):
+                if warn:
                     msg = "Warning: Upscaling source image (Quality Loss)"
                     w_item.setToolTip(msg)
                     h_item.setToolTip(msg)
-            except ValueError:
-                pass
 
 
     def make_transparent(self):
@@ -640,24 +772,16 @@ class DashboardWindow(QMainWindow):
         if color.isValid():
             # Convert to RGBA
             r, g, b, _ = color.getRgb()
-            target_color = (r, g, b)
-            
-            # Process Image
-            img = self.source_image.convert("RGBA")
-            data = img.getdata()
             
-            new_data = []
+            # Process Image in place (one vectorized compare instead of a per-pixel loop);
+            # source_image shares this buffer, so no PIL round trip is needed
+            arr = self._source_np
             # Tolerance? For now, exact match.
             # User might want tolerance slider later.
-            for item in data:
-                # item is (r,g,b,a)
-                if item[:3] == target_color:
-                    new_data.append((0, 0, 0, 0)) # Transparent
-                else:
-                    new_data.append(item)
-                    
-            img.putdata(new_data)
-            self.source_image = img
+            mask = (arr[..., 0] == r) & (arr[..., 1] == g) & (arr[..., 2] == b)
+            arr[mask] = 0 # Transparent
+            
+            self._last_transform_key = None # Same edits, new pixels
             self.update_transformed_source()
 
     def apply_edit(self, action):
@@ -683,30 +807,73 @@ class DashboardWindow(QMainWindow):
         # Let's store the current transformed image in self.source_image_transformed
         self.update_transformed_source()
             
-    def update_transformed_source(self):
-        if not self.source_image: return
-        
-        img = self.source_image.copy()
-        
-        # Rotate
-        if self.rotation != 0:
-            img = img.rotate(-self.rotation, expand=True, resample=Image.Resampling.BICUBIC)
+    def transform_source(self, resample=Image.Resampling.BILINEAR):
+        """Apply the rotate/flip edit state to source_image.
+        resample only matters for free-angle rotation (multiples of 90 are lossless)."""
+        # No copy: transpose/rotate/mirror/flip all return new images
+        img = self.source_image
+        
+        # Rotate (edits are always multiples of 90: pure pixel permutation, no resampling)
+        if self.rotation in ROTATE_TRANSPOSE:
+            img = img.transpose(ROTATE_TRANSPOSE[self.rotation])
+        elif self.rotation != 0:
+            img = img.rotate(-self.rotation, expand=True, resample=resample)
             
         # Flip
         if self.flip_h:
             img = ImageOps.mirror(img)
         # We need flip_v support
-        if hasattr(self, 'flip_v') and self.flip_v:
+        if self.flip_v:
              img = ImageOps.flip(img)
-             
+        return img
+        
+    def update_transformed_source(self):
+        if not self.source_image: return
+        
+        # Edit state unchanged (e.g. a no-op edit): keep the current buffers and pixmap.
+        # set_source and make_transparent reset the key when the pixels change.
+        key = (self.rotation, self.flip_h, self.flip_v)
+        if key == self._last_transform_key: return
+        self._last_transform_key = key
+        
+        if self.rotation in ROTATE_TRANSPOSE or self.rotation == 0:
+            # Rotate/flip as stride views of the source array (O(1) each); the
+            # chain is materialized by a single contiguous copy for Qt and PIL
+            arr = np.rot90(self._source_np, k=-(self.rotation // 90)) # Clockwise
+            if self.flip_h:
+                arr = np.fliplr(arr)
+            if self.flip_v:
+                arr = np.flipud(arr)
+            arr = np.ascontiguousarray(arr)
+            img = Image.fromarray(arr) # Zero-copy view
+        else:
+            # Interactive copy: BILINEAR is plenty at widget resolution
+            img = self.transform_source(Image.Resampling.BILINEAR)
+            arr = np.asarray(img)
         self.source_image_transformed = img
+        self._crop_cache_key = None # New pixels: cached preview crop is stale
+        self._preview_input_key = None
+        
+        # The widget pixmap wraps this buffer and update_preview slices it
+        # instead of re-cropping the PIL image each tick
+        self._transformed_np = arr
+        
+        # Downscaled levels, built once per transform: the widget proxy and a
+        # small preview source, each reduced from the previous level
+        levels = [(arr, 1.0)]
+        for limit in (WIDGET_PREVIEW_MAX, PREVIEW_SOURCE_MAX):
+            base = Image.fromarray(levels[-1][0])
+            if max(base.size) > limit:
+                small = ImageOps.contain(base, (limit, limit), Image.Resampling.BILINEAR)
+                levels.append((np.asarray(small), small.width / img.width))
+        self._preview_levels = levels
         
         # Update Widget
-        # Convert to QPixmap
-        data = img.convert("RGBA").tobytes("raw", "RGBA")
-        qim = QImage(data, img.width, img.height, QImage.Format.Format_RGBA8888)
-        pix = QPixmap.fromImage(qim)
-        self.image_label.set_image(pix)
+        # The widget only displays the image, so large sources get a proxy pixmap;
+        # it still works in full-res coordinates via image_size
+        widget_arr = next(a for a, _ in levels if max(a.shape[:2]) <= WIDGET_PREVIEW_MAX)
+        self._transformed_pix = array_to_pixmap(widget_arr)
+        self.image_label.set_image(self._transformed_pix, QSize(img.width, img.height))
         
         # Reset transforms in options? 
         # No, update_preview needs to NOT re-apply rotate/flip if we stuck them here.
@@ -719,16 +886,50 @@ class DashboardWindow(QMainWindow):
             self.load_image(path)
             
     def load_image(self, path):
-        self.source_image = Image.open(path).convert("RGBA")
+        im = Image.open(path)
+        src_mode = im.mode
+        if im.format == "JPEG" and max(im.size) > SOURCE_DECODE_MAX:
+            # draft never decodes below the requested size (in both dimensions),
+            # so ask for the aspect-correct box whose long side is the limit
+            scale = SOURCE_DECODE_MAX / max(im.size)
+            im.draft("RGB", (math.ceil(im.width * scale), math.ceil(im.height * scale)))
+        self.set_source(np.array(im.convert("RGBA")), src_mode)
+        
+    def set_source(self, arr: np.ndarray, src_mode: str = "RGBA"):
+        """Adopt an HxWx4 RGBA array as the new source and reset edits.
+        src_mode is the file's original mode, used to pick the output mode."""
+        self._source_np = arr
+        self._src_mode = src_mode
+        # Zero-copy PIL view: in-place array edits (make_transparent) show through
+        self.source_image = Image.fromarray(arr)
+        self._last_transform_key = None
         self.rotation = 0
         self.flip_h = False
         self.flip_v = False
         self.update_transformed_source()
-        self.convert_btn.setEnabled(True)
+        # A running export keeps the button until its finished signal
+        if self.convert_worker is None or not self.convert_worker.isRunning():
+            self.convert_btn.setEnabled(True)
         
     def update_preview(self):
-        if not hasattr(self, 'source_image_transformed') or not self.source_image_transformed: return
-        if not hasattr(self, 'slider_round'): return
+        """Schedule a preview refresh; rapid calls collapse into one."""
+        self._preview_timer.start()
+        
+    def preview_region(self, rect, min_side):
+        """Slice rect (full-res coords) from the smallest pyramid level on which
+        the selection's long side still spans min_side px."""
+        for arr, scale in reversed(self._preview_levels):
+            if scale == 1.0 or max(rect.width(), rect.height()) * scale >= min_side:
+                break
+        # At least one row/column: thin selections can scale to under a pixel
+        top, left = int(rect.y() * scale), int(rect.x() * scale)
+        bottom = max(top + 1, int(rect.bottom() * scale))
+        right = max(left + 1, int(rect.right() * scale))
+        return arr[top:bottom, left:right]
+        
+    def _do_update_preview(self):
+        if not self.source_image_transformed: return
+        if self.slider_round is None: return
         
         # Crop from Transformed Source
         # Get rect from widget (Image Coords)
@@ -737,12 +938,9 @@ class DashboardWindow(QMainWindow):
         # Validate rect
         if rect.width() <= 0 or rect.height() <= 0: return
         
-        # Crop
-        cropped = self.source_image_transformed.crop((rect.x(), rect.y(), rect.right(), rect.bottom()))
-        
         # Gather options from UI (Only Styling now)
         resize_ar = False
-        if hasattr(self, 'chk_resize_ar'):
+        if self.chk_resize_ar is not None:
             resize_ar = self.chk_resize_ar.isChecked()
             
         options = {
@@ -754,22 +952,46 @@ class DashboardWindow(QMainWindow):
             'resize_to_aspect': resize_ar 
         }
         
+        # Nothing changed since the last render (e.g. a control re-clicked): skip it
+        key = (rect.x(), rect.y(), rect.width(), rect.height())
+        input_key = (key, self.image_label.is_dragging, tuple(options.items()))
+        if input_key == self._preview_input_key:
+            self.check_resolution_quality()
+            return
+        self._preview_input_key = input_key
+        
+        # Styling-only changes (radius, background) reuse the last crop
+        if key == self._crop_cache_key:
+            cropped = self._crop_cache_img
+        elif self.image_label.is_dragging:
+            # Live drag frame: nearest-neighbour decimation by striding the array
+            # (no full-crop copy). Not cached; dragFinished re-renders with BILINEAR
+            region = self.preview_region(rect, PREVIEW_SIZE)
+            step = max(1, max(region.shape[:2]) // PREVIEW_SIZE)
+            cropped = Image.fromarray(region[::step, ::step])
+            cropped.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE), Image.Resampling.NEAREST)
+        else:
+            # Crop (same bounds as convert_image's PIL crop) from the smallest
+            # pyramid level that still holds 2x the preview size
+            cropped = Image.fromarray(self.preview_region(rect, 2 * PREVIEW_SIZE))
+            # Style at preview size, not full-res: radius is a percentage, so the
+            # result matches the export; BILINEAR is indistinguishable at 128 px
+            cropped.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE), Image.Resampling.BILINEAR)
+            self._crop_cache_key, self._crop_cache_img = key, cropped
+        
         # Process styling (Round, Bg)
-        from core.converter import IconConverter
         processed = IconConverter.process_image(cropped, options)
         
-        # Resize for preview
-        processed.thumbnail((300, 300))
-        data = processed.convert("RGBA").tobytes("raw", "RGBA")
-        qim = QImage(data, processed.width, processed.height, QImage.Format.Format_RGBA8888)
-        # Resize for preview
-        processed.thumbnail((128, 128))
-        data = processed.convert("RGBA").tobytes("raw", "RGBA")
-        qim = QImage(data, processed.width, processed.height, QImage.Format.Format_RGBA8888)
-        pix = QPixmap.fromImage(qim)
-        
-        if hasattr(self, 'preview_label'):
-            self.preview_label.setPixmap(pix)
+        if processed.mode != "RGBA":
+            processed = processed.convert("RGBA")
+        
+        # Only re-upload when the preview pixels actually changed (<= 64 KB compare)
+        w, h = processed.size
+        data = (w, h, processed.tobytes())
+        if self.preview_label is not None and data != self._last_preview_key:
+            self._last_preview_key = data
+            arr = np.frombuffer(data[2], dtype=np.uint8).reshape(h, w, 4)
+            self.preview_label.setPixmap(array_to_pixmap(arr))
             
         self.check_resolution_quality()
 
@@ -780,17 +1002,18 @@ class DashboardWindow(QMainWindow):
         sizes = []
         max_req_size = 0
         try:
-            for row in range(self.size_table.rowCount()):
-                chk_item = self.size_table.item(row, 0)
-                if chk_item.checkState() == Qt.CheckState.Checked:
-                    try:
-                        w = int(self.size_table.item(row, 1).text())
-                        h = int(self.size_table.item(row, 2).text())
+            # Fetch the items once, then scan in Python
+            table = self.size_table
+            checked, role = Qt.CheckState.Checked, Qt.ItemDataRole.UserRole
+            rows = [(table.item(r, 0), table.item(r, 1), table.item(r, 2)) for r in range(table.rowCount())]
+            for chk_item, w_item, h_item in rows:
+                if chk_item.checkState() == checked:
+                    w = w_item.data(role)
+                    h = h_item.data(role)
+                    if w is None or h is None: continue
                         
-                        sizes.append((w, h))
-                        max_req_size = max(max_req_size, w, h)
-                    except ValueError:
-                        pass
+                    sizes.append((w, h))
+                    max_req_size = max(max_req_size, w, h)
         except RuntimeError:
             print("Error: Widget deleted?")
             return
@@ -810,7 +1033,6 @@ class DashboardWindow(QMainWindow):
         src_max = max(src_w, src_h)
         
         if max_req_size > src_max:
-            from PyQt6.QtWidgets import QMessageBox
             reply = QMessageBox.warning(
                 self, 
                 "Upscale Warning", 
@@ -841,10 +1063,8 @@ class DashboardWindow(QMainWindow):
         if not path: return
         
         # 3. Process and Save
-        from core.converter import IconConverter
-        
         resize_ar = False
-        if hasattr(self, 'chk_resize_ar'):
+        if self.chk_resize_ar is not None:
             resize_ar = self.chk_resize_ar.isChecked()
 
         options = {
@@ -853,17 +1073,23 @@ class DashboardWindow(QMainWindow):
             'background_color': self.bg_color,
             'rotate': 0,
             'flip_h': False,
-            'resize_to_aspect': resize_ar
+            'resize_to_aspect': resize_ar,
+            # Grayscale/indexed files export opaque sizes back in their own mode;
+            # a coloured background fill would not survive 'L'
+            'output_mode': self._src_mode if self._src_mode in ("L", "P") and not self.chk_bg.isChecked() else None,
+            'optimize_png': self.chk_optimize_png.isChecked()
         }
         
         # Crop from Transformed Source
         rect = self.image_label.selection_rect.toRect()
         if rect.width() <= 0 or rect.height() <= 0: return
         
-        final_img = self.source_image_transformed.crop((rect.x(), rect.y(), rect.right(), rect.bottom()))
-        
-        # Full resolution process
-        final_img = IconConverter.process_image(final_img, options)
+        source = self.source_image_transformed
+        if self.rotation != 0 and self.rotation not in ROTATE_TRANSPOSE:
+            # Free-angle rotation: re-render from the original with the export-quality filter
+            source = self.transform_source(Image.Resampling.BICUBIC)
+        # crop() copies, so later edits to the source can't race the worker
+        final_img = source.crop((rect.x(), rect.y(), rect.right(), rect.bottom()))
         
         # Determine internal format list for save_icon
         fmts = []
@@ -876,8 +1102,22 @@ class DashboardWindow(QMainWindow):
         # Converter needs a tiny update for BMP loop if not present.
         # But 'png' logic in converter does loop.
         
-        IconConverter.save_icon(final_img, path, fmts, sizes, options=options)
-        print("Saved!")
+        # Full resolution process + save in the background; one export at a time
+        self.convert_btn.setEnabled(False)
+        self.convert_progress.setValue(0)
+        self.convert_progress.setVisible(True)
+        self.convert_worker = ConvertThread(final_img, path, fmts, sizes, options)
+        self.convert_worker.progress.connect(self.convert_progress.setValue)
+        self.convert_worker.finished.connect(self.convert_finished)
+        self.convert_worker.start()
+        
+    def convert_finished(self, success: bool, message: str):
+        self.convert_progress.setVisible(False)
+        self.convert_btn.setEnabled(True)
+        if success:
+            print("Saved!")
+        else:
+            QMessageBox.warning(self, "Save Failed", f"Could not save the icon:\n{message}")
 
     # Drag & Drop
     def dragEnterEvent(self, event: QDragEnterEvent):
@@ -895,13 +1135,12 @@ class DashboardWindow(QMainWindow):
         if mime.hasImage():
             img = clipboard.image()
             if not img.isNull():
-                # Convert QImage to PIL
-                # Save to buffer
-                from io import BytesIO
-                buf = BytesIO()
-                img.save(buf, "PNG")
-                buf.seek(0)
-                self.source_image = Image.open(buf).convert("RGBA")
-                self.update_preview()
-                self.convert_btn.setEnabled(True)
+                # Convert QImage straight to an RGBA array
+                # (QImage.save can't write to a BytesIO; rows may be padded)
+                qim = img.convertToFormat(QImage.Format.Format_RGBA8888)
+                w, h = qim.width(), qim.height()
+                ptr = qim.constBits()
+                ptr.setsize(qim.sizeInBytes())
+                rows = np.frombuffer(ptr, dtype=np.uint8).reshape(h, qim.bytesPerLine())
+                self.set_source(rows[:, :w * 4].reshape(h, w, 4).copy())
                 print("Image pasted from clipboard")
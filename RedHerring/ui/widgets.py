@@ -3,11 +3,25 @@ Custom Widgets for RedHerring.
 """
 from PyQt6.QtWidgets import QLabel, QWidget, QMenu, QSizePolicy, QToolButton, QVBoxLayout, QFrame, QHBoxLayout, QToolTip
 from PyQt6.QtCore import Qt, pyqtSignal, QRectF, QPointF, QSize, QSizeF, QRect, QPropertyAnimation, QAbstractAnimation, QParallelAnimationGroup, QPoint
-from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QCursor, QPixmap, QImage, QIcon, QAction
+from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QCursor, QPixmap, QImage, QIcon, QAction, QRegion, QPixmapCache
+
+# Room for a few fitted crop-widget pixmaps (KB; Qt's default is 10 MB)
+QPixmapCache.setCacheLimit(40960)
+
+# Cursor shown over each hit_test() result
+HIT_CURSORS = {
+    'nw': Qt.CursorShape.SizeFDiagCursor,
+    'se': Qt.CursorShape.SizeFDiagCursor,
+    'ne': Qt.CursorShape.SizeBDiagCursor,
+    'sw': Qt.CursorShape.SizeBDiagCursor,
+    'move': Qt.CursorShape.SizeAllCursor,
+    None: Qt.CursorShape.ArrowCursor,
+}
 
 class InteractiveImageLabel(QLabel):
     # Signals
     selectionChanged = pyqtSignal(QRect) # Emits rect in IMAGE coordinates
+    dragFinished = pyqtSignal()          # Mouse released after a selection drag
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -16,12 +30,16 @@ class InteractiveImageLabel(QLabel):
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         # State
-        self.source_pixmap = None     # The full-res image
+        self.source_pixmap = None     # The displayed source (may be a downscaled proxy)
+        self.image_size = QSize()     # Full-res size: the coordinate space for selections
         self.scaled_pixmap = None     # The displayed image (fitted to widget)
         self.scale_factor = 1.0       # Ratio: displayed / source
         self.offset = QPointF(0, 0)   # Top-left of painted image in widget coords
         
         self.selection_rect = QRectF() # In IMAGE coordinates (0,0 to w,h)
+        self._sel_widget_rect = None   # selection_rect in widget coords; None = recompute
+        self._handle_rects = None      # Handle squares for that rect; None = recompute
+        self._last_emitted_rect = QRect() # Last rect sent through selectionChanged
         
         # Interaction
         self.is_dragging = False
@@ -34,43 +52,78 @@ class InteractiveImageLabel(QLabel):
         self.handle_size = 8
         self.min_selection_size = 10
         
+        # Checkerboard tile (2x2 cells), blitted with drawTiledPixmap
+        self._checker_pm = self.make_checker_pixmap(10)
+        
+        # Selection pens/brush, reused every paint
+        self._ants_pen = QPen(Qt.GlobalColor.white, 1, Qt.PenStyle.CustomDashLine)
+        self._ants_pen.setDashPattern([4, 4]) # 4px dash, 4px gap
+        self._handle_pen = QPen(Qt.GlobalColor.black)
+        self._handle_brush = QBrush(Qt.GlobalColor.white)
+        self._overlay_brush = QBrush(QColor(0, 0, 0, 150))
+        
         # Marching Ants
         self.dash_offset = 0
         from PyQt6.QtCore import QTimer
         self.ant_timer = QTimer(self)
+        self.ant_timer.setInterval(100) # Runs only while shown (showEvent/hideEvent)
         self.ant_timer.timeout.connect(self.animate_ants)
-        self.ant_timer.start(100) # 100ms interval
+        
+        # Live resizes use a fast rescale; the smooth one runs once they settle
+        self._resize_settle = QTimer(self)
+        self._resize_settle.setSingleShot(True)
+        self._resize_settle.setInterval(150)
+        self._resize_settle.timeout.connect(self.rescale_smooth)
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.ant_timer.start()
+        
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.ant_timer.stop()
         
     def animate_ants(self):
+        if not self.source_pixmap or not self.selection_rect.isValid(): return
         self.dash_offset -= 1
         if self.dash_offset < 0: self.dash_offset = 15 # Wrap around (dash len approx)
-        self.update()
+        
+        # Only the dashed border (and the handles on it) changes: repaint that band
+        sel = self.selection_widget_rect().toAlignedRect()
+        hs = self.handle_size
+        band = QRegion(sel.adjusted(-hs, -hs, hs, hs)).subtracted(QRegion(sel.adjusted(hs, hs, -hs, -hs)))
+        self.update(band)
             
-    def set_image(self, pixmap: QPixmap):
-        """Set the source image and reset selection to full."""
+    def set_image(self, pixmap: QPixmap, image_size: QSize = None):
+        """Set the source image and reset selection to full.
+        image_size: full-res size when pixmap is a downscaled proxy (default: pixmap size)."""
         self.source_pixmap = pixmap
         if pixmap:
-            w, h = pixmap.width(), pixmap.height()
+            self.image_size = image_size or pixmap.size()
+            w, h = self.image_size.width(), self.image_size.height()
             self.selection_rect = QRectF(0, 0, w, h)
             self.update_geometry_cache()
         else:
             self.selection_rect = QRectF()
             self.scaled_pixmap = None
+        self.invalidate_selection_cache()
             
         self.update()
         if self.selection_rect.isValid():
-            self.selectionChanged.emit(self.selection_rect.toRect())
+            self.emit_selection()
             
     def set_selection(self, rect: QRect):
         """Programmatically set selection (e.g. from spinboxes)."""
         if not self.source_pixmap: return
         
         # Clamp to image bounds
-        img_rect = QRectF(0, 0, self.source_pixmap.width(), self.source_pixmap.height())
+        img_rect = QRectF(0, 0, self.image_size.width(), self.image_size.height())
         new_rect = QRectF(rect).intersected(img_rect)
         
         if new_rect != self.selection_rect:
             self.selection_rect = new_rect
+            self._last_emitted_rect = new_rect.toRect() # The caller already has it
+            self.invalidate_selection_cache()
             self.update()
             
     def set_aspect_ratio_mode(self, mode: str):
@@ -79,15 +132,25 @@ class InteractiveImageLabel(QLabel):
         # Re-apply constraint to current selection if needed
         if mode != "Free" and self.source_pixmap:
             self.constrain_selection(self.selection_rect)
+            self.invalidate_selection_cache()
             self.update()
-            self.selectionChanged.emit(self.selection_rect.toRect())
+            self.emit_selection()
+            
+    def emit_selection(self):
+        """Emit selectionChanged, unless the integer rect is the one last emitted
+        (e.g. a drag held against the image edge)."""
+        rect = self.selection_rect.toRect()
+        if rect != self._last_emitted_rect:
+            self._last_emitted_rect = rect
+            self.selectionChanged.emit(rect)
 
-    def update_geometry_cache(self):
-        """Calculate scale factor and offset based on widget size."""
+    def update_geometry_cache(self, smooth=True):
+        """Calculate scale factor and offset based on widget size.
+        smooth=False: on a cache miss, rescale with FastTransformation (not cached)."""
         if not self.source_pixmap: return
         
         w_widget, h_widget = self.width(), self.height()
-        w_img, h_img = self.source_pixmap.width(), self.source_pixmap.height()
+        w_img, h_img = self.image_size.width(), self.image_size.height()
         
         if w_img == 0 or h_img == 0: return
 
@@ -99,44 +162,79 @@ class InteractiveImageLabel(QLabel):
         disp_w = w_img * self.scale_factor
         disp_h = h_img * self.scale_factor
         
-        self.scaled_pixmap = self.source_pixmap.scaled(
-            int(disp_w), int(disp_h), 
-            Qt.AspectRatioMode.KeepAspectRatio, 
-            Qt.TransformationMode.SmoothTransformation
-        )
+        # Reuse earlier fits of this pixmap (resizes often go back and forth)
+        key = f"crop_fit_{self.source_pixmap.cacheKey()}_{int(disp_w)}x{int(disp_h)}"
+        self.scaled_pixmap = QPixmapCache.find(key)
+        if self.scaled_pixmap is None:
+            self.scaled_pixmap = self.source_pixmap.scaled(
+                int(disp_w), int(disp_h), 
+                Qt.AspectRatioMode.KeepAspectRatio, 
+                Qt.TransformationMode.SmoothTransformation if smooth else Qt.TransformationMode.FastTransformation
+            )
+            if smooth:
+                QPixmapCache.insert(key, self.scaled_pixmap)
         
         # Center the image
         off_x = (w_widget - disp_w) / 2
         off_y = (h_widget - disp_h) / 2
         self.offset = QPointF(off_x, off_y)
+        self.invalidate_selection_cache()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
+        self.update_geometry_cache(smooth=False)
+        if self.source_pixmap:
+            self._resize_settle.start()
+        
+    def rescale_smooth(self):
+        """Replace the fast live-resize rescale with the smooth one."""
         self.update_geometry_cache()
+        self.update()
         
     def paintEvent(self, event):
         super().paintEvent(event)
         
+        # No antialiasing: everything drawn here is axis-aligned
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         
         if self.scaled_pixmap:
-            # Draw Checkerboard Background
-            self.draw_checkerboard(painter)
+            # Only redo the steps that touch the damaged area (e.g. the ants' border band)
+            region = event.region()
+            
+            if region.intersects(QRect(self.offset.toPoint(), self.scaled_pixmap.size())):
+                # Draw Checkerboard Background
+                self.draw_checkerboard(painter)
+                
+                # Draw Image
+                painter.drawPixmap(self.offset.toPoint(), self.scaled_pixmap)
             
-            # Draw Image
-            painter.drawPixmap(self.offset.toPoint(), self.scaled_pixmap)
+            # Selection in widget coords, shared by the overlay and border
+            sel = self.selection_widget_rect()
             
             # Darken overlay outside selection
-            self.draw_overlay(painter)
+            self.draw_overlay(painter, sel)
             
             # Draw Selection Border
-            self.draw_selection(painter)
+            hs = self.handle_size
+            if region.intersects(sel.toAlignedRect().adjusted(-hs, -hs, hs, hs)):
+                self.draw_selection(painter, sel)
         else:
             # If no image, maybe draw placeholder text?
             # Handled by parent label text usually
             pass
 
+    @staticmethod
+    def make_checker_pixmap(size: int) -> QPixmap:
+        """One 2x2 tile of the checkerboard: light top-left/bottom-right, dark elsewhere."""
+        pm = QPixmap(2 * size, 2 * size)
+        pm.fill(QColor(255, 255, 255))
+        painter = QPainter(pm)
+        dark = QColor(204, 204, 204)
+        painter.fillRect(size, 0, size, size, dark)
+        painter.fillRect(0, size, size, size, dark)
+        painter.end()
+        return pm
+
     def draw_checkerboard(self, painter):
         """Draw a checkerboard pattern behind the image area."""
         # We only need to draw where the image is
@@ -145,59 +243,26 @@ class InteractiveImageLabel(QLabel):
         w = self.scaled_pixmap.width()
         h = self.scaled_pixmap.height()
         
-        # Grid Size
-        size = 10
-        light = QColor(255, 255, 255)
-        dark = QColor(204, 204, 204)
-        
-        # Optimize: Draw a tiled pixmap or just loops?
-        # Loops are fine for typical icon sizes.
-        
-        # Clip to image area
-        painter.save()
-        painter.setClipRect(x, y, w, h)
-        
-        # Fill background first
-        painter.fillRect(x, y, w, h, light)
-        
-        cols = w // size + 1
-        rows = h // size + 1
-        
-        painter.setBrush(dark)
-        painter.setPen(Qt.PenStyle.NoPen)
-        
-        for r in range(rows):
-            for c in range(cols):
-                if (r + c) % 2 == 1:
-                    painter.drawRect(x + c * size, y + r * size, size, size)
-                    
-        painter.restore()
+        # One native tiled blit, anchored at the image's top-left
+        painter.drawTiledPixmap(x, y, w, h, self._checker_pm)
 
-    def draw_overlay(self, painter):
-        """Draw semi-transparent overlay excluding selection."""
+    def draw_overlay(self, painter, sel: QRectF):
+        """Draw semi-transparent overlay excluding selection (sel: widget coords)."""
         if not self.selection_rect.isValid(): return
         
-        # Widget Rect
-        w, h = self.width(), self.height()
-        
-        # Selection in Widget Coords
-        sel = self.map_from_image(self.selection_rect)
+        # Hole, rounded once so it lines up with the pixel grid (a stray
+        # undarkened row would sit outside the partial-repaint area)
+        left, top = int(sel.left()), int(sel.top())
+        hole = QRect(left, top, int(sel.right()) - left, int(sel.bottom()) - top)
         
-        painter.setBrush(QColor(0, 0, 0, 150))
-        painter.setPen(Qt.PenStyle.NoPen)
-        
-        # Top
-        painter.drawRect(0, 0, w, int(sel.top()))
-        # Bottom
-        painter.drawRect(0, int(sel.bottom()), w, h - int(sel.bottom()))
-        # Left (between top/bottom)
-        painter.drawRect(0, int(sel.top()), int(sel.left()), int(sel.height()))
-        # Right
-        painter.drawRect(int(sel.right()), int(sel.top()), w - int(sel.right()), int(sel.height()))
+        # One fill clipped to (widget - hole) instead of four strips
+        painter.save()
+        painter.setClipRegion(QRegion(self.rect()).subtracted(QRegion(hole)))
+        painter.fillRect(self.rect(), self._overlay_brush)
+        painter.restore()
 
-    def draw_selection(self, painter):
-        """Draw border handles and grid."""
-        sel = self.map_from_image(self.selection_rect)
+    def draw_selection(self, painter, sel: QRectF):
+        """Draw border handles and grid (sel: selection in widget coords)."""
         
         # Border
         # Marching Ants Effect: Black and White dashes moving?
@@ -209,15 +274,14 @@ class InteractiveImageLabel(QLabel):
         # But to be visible on white/black, alternating colors is good.
         # Let's just animate the dash for now as requested.
         
-        pen = QPen(Qt.GlobalColor.white, 1, Qt.PenStyle.CustomDashLine)
-        pen.setDashPattern([4, 4]) # 4px dash, 4px gap
-        pen.setDashOffset(self.dash_offset)
+        # Pen built once in __init__; only the offset moves
+        self._ants_pen.setDashOffset(self.dash_offset)
         
         # Draw outlines to ensure visibility?
         # Or just Draw once with white, maybe shadow?
         # Simple animated dash:
         
-        painter.setPen(pen)
+        painter.setPen(self._ants_pen)
         painter.setBrush(Qt.BrushStyle.NoBrush)
         painter.drawRect(sel)
         
@@ -229,28 +293,49 @@ class InteractiveImageLabel(QLabel):
         # painter.drawRect(sel)
         
         # Handles (Corners)
-        painter.setBrush(Qt.GlobalColor.white)
-        painter.setPen(Qt.GlobalColor.black)
+        painter.setBrush(self._handle_brush)
+        painter.setPen(self._handle_pen)
         
-        hs = self.handle_size
-        handles = [
-            sel.topLeft(), sel.topRight(), sel.bottomLeft(), sel.bottomRight(),
-            QPointF(sel.center().x(), sel.top()),    # N
-            QPointF(sel.center().x(), sel.bottom()), # S
-            QPointF(sel.left(), sel.center().y()),   # W
-            QPointF(sel.right(), sel.center().y())   # E
-        ]
-        
-        for pt in handles:
-            painter.drawRect(QRectF(pt.x() - hs/2, pt.y() - hs/2, hs, hs))
+        painter.drawRects(self.handle_rects())
 
     # --- Coordinate Mapping ---
     def map_to_image(self, pos: QPointF) -> QPointF:
         """Widget -> Image Coords"""
-        x = (pos.x() - self.offset.x()) / self.scale_factor
-        y = (pos.y() - self.offset.y()) / self.scale_factor
-        return QPointF(x, y)
+        return QPointF(*self.map_to_image_xy(pos.x(), pos.y()))
+        
+    def map_to_image_xy(self, x: float, y: float) -> tuple:
+        """Widget -> Image Coords on plain floats (mouse-move path: no QPointF)."""
+        s = self.scale_factor
+        return (x - self.offset.x()) / s, (y - self.offset.y()) / s
 
+    def selection_widget_rect(self) -> QRectF:
+        """selection_rect in widget coords, cached until the selection or geometry changes.
+        Callers must not modify the returned rect."""
+        if self._sel_widget_rect is None:
+            self._sel_widget_rect = self.map_from_image(self.selection_rect)
+        return self._sel_widget_rect
+        
+    def handle_rects(self) -> list:
+        """The eight handle squares around the selection (widget coords), cached with it."""
+        if self._handle_rects is None:
+            sel = self.selection_widget_rect()
+            hs = self.handle_size
+            cx, cy = sel.center().x(), sel.center().y()
+            handles = [
+                (sel.left(), sel.top()), (sel.right(), sel.top()),
+                (sel.left(), sel.bottom()), (sel.right(), sel.bottom()),
+                (cx, sel.top()),    # N
+                (cx, sel.bottom()), # S
+                (sel.left(), cy),   # W
+                (sel.right(), cy)   # E
+            ]
+            self._handle_rects = [QRectF(x - hs/2, y - hs/2, hs, hs) for x, y in handles]
+        return self._handle_rects
+        
+    def invalidate_selection_cache(self):
+        self._sel_widget_rect = None
+        self._handle_rects = None
+        
     def map_from_image(self, rect: QRectF) -> QRectF:
         """Image -> Widget Coords"""
         x = rect.x() * self.scale_factor + self.offset.x()
@@ -260,25 +345,28 @@ class InteractiveImageLabel(QLabel):
         return QRectF(x, y, w, h)
         
     # --- Mouse Interaction ---
+    def hit_test(self, pos: QPointF, sel: QRectF):
+        """Drag mode under pos: a corner ('nw', 'ne', 'sw', 'se'), 'move' inside, else None.
+        sel is the selection in widget coords. Plain float math, no Qt temporaries."""
+        px, py = pos.x(), pos.y()
+        left, top, right, bottom = sel.left(), sel.top(), sel.right(), sel.bottom()
+        reach = self.handle_size * 2
+        # Corners win over 'move' (Manhattan distance, as before)
+        for mode, cx, cy in (('nw', left, top), ('ne', right, top), ('sw', left, bottom), ('se', right, bottom)):
+            if abs(px - cx) + abs(py - cy) < reach:
+                return mode
+        if left <= px <= right and top <= py <= bottom:
+            return 'move'
+        return None
+        
     def mousePressEvent(self, event):
         if not self.source_pixmap: return
         
         pos = event.position()
-        sel = self.map_from_image(self.selection_rect)
-        hs = self.handle_size
-        
-        # Check handles
-        # NW, NE, SW, SE
-        if (pos - sel.topLeft()).manhattanLength() < hs*2: self.drag_mode = 'nw'
-        elif (pos - sel.topRight()).manhattanLength() < hs*2: self.drag_mode = 'ne'
-        elif (pos - sel.bottomLeft()).manhattanLength() < hs*2: self.drag_mode = 'sw'
-        elif (pos - sel.bottomRight()).manhattanLength() < hs*2: self.drag_mode = 'se'
-        # Inside -> Move
-        elif sel.contains(pos): self.drag_mode = 'move'
-        else:
+        self.drag_mode = self.hit_test(pos, self.selection_widget_rect())
+        if self.drag_mode is None:
             # Outside -> Start new selection? Or ignore?
             # Let's ignore for now to keep it simple, or 'move' could re-center
-            self.drag_mode = None
             return
 
         self.is_dragging = True
@@ -291,87 +379,93 @@ class InteractiveImageLabel(QLabel):
         pos = event.position()
         
         # Cursor Update
-        sel = self.map_from_image(self.selection_rect)
+        sel = self.selection_widget_rect()
         hs = self.handle_size
         
-        cursor = Qt.CursorShape.ArrowCursor
-        if (pos - sel.topLeft()).manhattanLength() < hs*2: cursor = Qt.CursorShape.SizeFDiagCursor
-        elif (pos - sel.topRight()).manhattanLength() < hs*2: cursor = Qt.CursorShape.SizeBDiagCursor
-        elif (pos - sel.bottomLeft()).manhattanLength() < hs*2: cursor = Qt.CursorShape.SizeBDiagCursor
-        elif (pos - sel.bottomRight()).manhattanLength() < hs*2: cursor = Qt.CursorShape.SizeFDiagCursor
-        elif sel.contains(pos): cursor = Qt.CursorShape.SizeAllCursor
-        
-        self.setCursor(cursor)
+        self.setCursor(HIT_CURSORS[self.hit_test(pos, sel)])
         
         if not self.is_dragging or not self.drag_mode: return
         
         # Calculate delta in IMAGE Coords
-        start_img = self.map_to_image(self.drag_start_pos)
-        curr_img = self.map_to_image(pos)
-        dx = curr_img.x() - start_img.x()
-        dy = curr_img.y() - start_img.y()
-        
-        new_rect = QRectF(self.drag_start_rect)
-        
-        # Apply Delta based on mode
+        start_x, start_y = self.map_to_image_xy(self.drag_start_pos.x(), self.drag_start_pos.y())
+        curr_x, curr_y = self.map_to_image_xy(pos.x(), pos.y())
+        dx = curr_x - start_x
+        dy = curr_y - start_y
+        
+        # Apply Delta based on mode (moved corner; the opposite one stays put)
+        start = self.drag_start_rect
+        x, y, w, h = start.x(), start.y(), start.width(), start.height()
         if self.drag_mode == 'move':
-            new_rect.translate(dx, dy)
+            x += dx; y += dy
         elif self.drag_mode == 'nw':
-            new_rect.setTopLeft(new_rect.topLeft() + QPointF(dx, dy))
+            x += dx; y += dy; w -= dx; h -= dy
         elif self.drag_mode == 'ne':
-            new_rect.setTopRight(new_rect.topRight() + QPointF(dx, dy))
+            y += dy; w += dx; h -= dy
         elif self.drag_mode == 'sw':
-            new_rect.setBottomLeft(new_rect.bottomLeft() + QPointF(dx, dy))
+            x += dx; w -= dx; h += dy
         elif self.drag_mode == 'se':
-            new_rect.setBottomRight(new_rect.bottomRight() + QPointF(dx, dy))
+            w += dx; h += dy
             
-        # Constrain Aspect Ratio if needed
-        new_rect = self.constrain_selection(new_rect, self.drag_mode)
-            
-        # Clamp to Image Bounds
-        img_w, img_h = self.source_pixmap.width(), self.source_pixmap.height()
-        new_rect = new_rect.intersected(QRectF(0, 0, img_w, img_h))
-        
-        # Enforce Min Size
-        if new_rect.width() < self.min_selection_size: new_rect.setWidth(self.min_selection_size)
-        if new_rect.height() < self.min_selection_size: new_rect.setHeight(self.min_selection_size)
-        
-        self.selection_rect = new_rect
-        self.update()
-        self.selectionChanged.emit(self.selection_rect.toRect())
+        self.selection_rect = self.finalize_rect(x, y, w, h)
+        self.invalidate_selection_cache()
+        # Outside the old and new selection the (darkened) pixels stay the same
+        dirty = sel.united(self.selection_widget_rect()).toAlignedRect()
+        self.update(dirty.adjusted(-hs, -hs, hs, hs))
+        self.emit_selection()
 
     def mouseReleaseEvent(self, event):
+        was_dragging = self.is_dragging
         self.is_dragging = False
         self.drag_mode = None
+        if was_dragging:
+            self.dragFinished.emit()
 
-    def constrain_selection(self, rect: QRectF, mode=None) -> QRectF:
-        """Adjust rect to match aspect ratio constraint."""
-        if self.aspect_ratio_mode == "Free": return rect
-        
-        target_ratio = 1.0
+    def target_ratio(self):
+        """Width/height the selection must keep, or None when unconstrained."""
         if self.aspect_ratio_mode == "Square":
-            target_ratio = 1.0
-        elif self.aspect_ratio_mode == "Original":
-             if self.source_pixmap:
-                 target_ratio = self.source_pixmap.width() / self.source_pixmap.height()
-             else:
-                 return rect
-        
+            return 1.0
+        if self.aspect_ratio_mode == "Original" and self.source_pixmap:
+            return self.image_size.width() / self.image_size.height()
+        return None
+        
+    @staticmethod
+    def constrained_size(w, h, ratio):
+        """Grow w or h so that w/h == ratio (the top-left corner stays put)."""
         # Adjust width or height to match ratio
         # Simple approach: fix width, adjust height (unless primarily dragging height)
         # For corners, we usually take the larger dimension change
-        
-        w, h = rect.width(), rect.height()
-        
-        if w/h > target_ratio:
+        if w/h > ratio:
             # Too wide, reduce width (or increase height?)
             # Standard interaction: set height based on width?
-            h = w / target_ratio
-        else:
-            w = h * target_ratio
-            
-        rect.setSize(QSizeF(w, h))
+            return w, w / ratio
+        return h * ratio, h
+
+    def constrain_selection(self, rect: QRectF, mode=None) -> QRectF:
+        """Adjust rect to match aspect ratio constraint."""
+        ratio = self.target_ratio()
+        if ratio is None: return rect
+        
+        rect.setSize(QSizeF(*self.constrained_size(rect.width(), rect.height(), ratio)))
         return rect
+        
+    def finalize_rect(self, x, y, w, h) -> QRectF:
+        """Aspect constraint, clamp to the image and minimum size in one pass.
+        Takes the raw dragged rect (image coords, may be inverted), builds one QRectF."""
+        ratio = self.target_ratio()
+        if ratio is not None:
+            w, h = self.constrained_size(w, h, ratio)
+            
+        # Clamp to Image Bounds (normalising a handle dragged past the opposite edge)
+        left, right = (x + w, x) if w < 0 else (x, x + w)
+        top, bottom = (y + h, y) if h < 0 else (y, y + h)
+        left, top = max(left, 0.0), max(top, 0.0)
+        right, bottom = min(right, self.image_size.width()), min(bottom, self.image_size.height())
+        if left >= right or top >= bottom:
+            left = top = right = bottom = 0.0 # No overlap: empty rect at the origin
+            
+        # Enforce Min Size
+        m = self.min_selection_size
+        return QRectF(left, top, max(right - left, m), max(bottom - top, m))
 
 class CollapsibleBox(QWidget):
     def __init__(self, title="", parent=None):
@@ -405,19 +499,26 @@ class CollapsibleBox(QWidget):
         # Determine content height
         # We need a layout in content_area to measure it
         self.content_layout = QVBoxLayout(self.content_area)
+        self._content_height = -1 # Measured on first toggle; -1 = measure again
         
     def setContentLayout(self, layout):
         # Instead of replacing, add to existing layout
         self.content_layout.addLayout(layout)
+        self.invalidate_content_height()
+        
+    def invalidate_content_height(self):
+        """Re-measure the content on the next toggle (call after changing its widgets)."""
+        self._content_height = -1
 
     def on_pressed(self):
         checked = self.toggle_button.isChecked()
         self.toggle_button.setArrowType(Qt.ArrowType.DownArrow if checked else Qt.ArrowType.RightArrow)
         self.toggle_animation.setDirection(QAbstractAnimation.Direction.Forward if checked else QAbstractAnimation.Direction.Backward)
         
-        # Recalculate height
-        content_height = self.content_area.layout().sizeHint().height()
-        self.animation.setEndValue(content_height)
+        # Measure once: sizeHint walks the whole content tree
+        if self._content_height < 0:
+            self._content_height = self.content_area.layout().sizeHint().height()
+        self.animation.setEndValue(self._content_height)
         
         self.toggle_animation.start()
         